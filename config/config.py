@@ -29,5 +29,8 @@ class Config:
     ELEMENT_WAIT_TIMEOUT = 10000
     VIDEO_CHECK_INTERVAL = 5000  # 视频进度检查间隔
     
+    # 课程列表缓存有效期（秒）
+    COURSE_CACHE_TTL = 600
+    
     # 验证码相关
     CAPTCHA_MAX_RETRIES = 3
\ No newline at end of file
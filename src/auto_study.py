@@ -14,6 +14,9 @@ sys.path.insert(0, str(project_root))
 
 from enhanced_video_monitor import EnhancedVideoMonitor
 
+# 页面进度文本中的百分比，如 "45.5%"
+_PROGRESS_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+
 class AutoStudyManager:
     def __init__(self, page: Page):
         self.page = page
@@ -350,7 +353,7 @@ class AutoStudyManager:
                     for element in elements:
                         if element.is_visible():
                             progress_text = element.inner_text()
-                            progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
+                            progress_match = _PROGRESS_RE.search(progress_text)
                             if progress_match:
                                 return float(progress_match.group(1))
                 except:
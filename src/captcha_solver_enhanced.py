@@ -10,8 +10,11 @@
 5. 失败图像保存用于分析
 """
 
+import hashlib
 import io
+import itertools
 import time
+from collections import OrderedDict
 from typing import Optional, Union, Dict, Any
 from pathlib import Path
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
@@ -26,15 +29,27 @@ try:
 except:
     pass
 
+# OpenCV 为可选依赖，可用时二值化走其向量化实现
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 
 class EnhancedCaptchaSolver:
     """增强版验证码识别器 - 高成功率版本"""
     
+    # 失败图片文件名序号，避免同一秒内多次保存互相覆盖
+    _failed_image_counter = itertools.count()
+    
     def __init__(self):
         """初始化验证码识别器"""
         self.logger = logging.getLogger(__name__)
-        self._ocr = None
-        self._init_ocr()
+        self._ocr = None  # 首次识别时再加载OCR模型
+        
+        # OCR结果缓存：预处理后图片字节的blake2b摘要 -> 原始识别结果
+        self._ocr_cache: OrderedDict = OrderedDict()
+        self._ocr_cache_size = 64
         
         # 识别统计
         self._recognition_stats = {
@@ -50,10 +65,17 @@ class EnhancedCaptchaSolver:
             'enhance_sharpness': True,     # 锐度增强  
             'remove_noise': True,          # 去噪处理
             'binarization': False,         # 二值化（某些验证码可能有害）
+            'otsu_threshold': False,       # 二值化使用Otsu阈值（需要OpenCV）
             'resize_factor': 2.0,          # 放大倍数
             'equalization': True           # 直方图均衡化
         }
         
+        # 锐化卷积核，只构建一次：ImageEnhance.Sharpness(2.0) = 2*原图 - SMOOTH，
+        # SMOOTH 核为 [[1,1,1],[1,5,1],[1,1,1]]/13，合并后即下面的核除以13
+        sharp_weights = np.array([[-1, -1, -1], [-1, 21, -1], [-1, -1, -1]], dtype=np.float32)
+        self._sharp_kernel = sharp_weights / 13
+        self._sharp_filter = ImageFilter.Kernel((3, 3), sharp_weights.ravel().tolist(), scale=13)
+        
         print("增强版验证码识别器初始化成功 - 基于高成功率优化")
     
     def _init_ocr(self) -> None:
@@ -85,6 +107,11 @@ class EnhancedCaptchaSolver:
             pil_image = self._convert_to_pil(image)
             processed_image = pil_image.copy()
             
+            # 快速质量探测 - 已是高对比度的图片跳过均衡化/对比度/锐度增强
+            skip_enhance = self._is_high_contrast(pil_image)
+            if skip_enhance:
+                self.logger.debug("验证码图片对比度已足够，跳过增强步骤")
+            
             # 调整大小 - 放大提高识别精度
             if self._preprocess_config['resize_factor'] != 1.0:
                 width, height = processed_image.size
@@ -97,18 +124,17 @@ class EnhancedCaptchaSolver:
                 processed_image = processed_image.convert('L')
             
             # 直方图均衡化 - 改善对比度
-            if self._preprocess_config['equalization']:
+            if self._preprocess_config['equalization'] and not skip_enhance:
                 processed_image = ImageOps.equalize(processed_image)
             
             # 增强对比度
-            if self._preprocess_config['enhance_contrast']:
+            if self._preprocess_config['enhance_contrast'] and not skip_enhance:
                 enhancer = ImageEnhance.Contrast(processed_image)
                 processed_image = enhancer.enhance(1.5)  # 增强50%的对比度
             
             # 增强锐度
-            if self._preprocess_config['enhance_sharpness']:
-                enhancer = ImageEnhance.Sharpness(processed_image)
-                processed_image = enhancer.enhance(2.0)  # 增强锐度
+            if self._preprocess_config['enhance_sharpness'] and not skip_enhance:
+                processed_image = self._sharpen(processed_image)
             
             # 去除噪声 - 中值滤波
             if self._preprocess_config['remove_noise']:
@@ -116,12 +142,12 @@ class EnhancedCaptchaSolver:
             
             # 可选的二值化处理
             if self._preprocess_config['binarization']:
-                # 转换为numpy数组进行高级二值化
-                img_array = np.array(processed_image)
-                # 使用自适应阈值
-                threshold = np.mean(img_array)
-                binary_array = np.where(img_array > threshold, 255, 0).astype(np.uint8)
-                processed_image = Image.fromarray(binary_array)
+                # 转换为numpy数组进行高级二值化（asarray/frombuffer 共享缓冲区，不额外复制）
+                img_array = np.asarray(processed_image)
+                binary_array = np.ascontiguousarray(self._binarize(img_array))
+                processed_image = Image.frombuffer(
+                    'L', binary_array.shape[::-1], binary_array, 'raw', 'L', 0, 1
+                )
             
             self.logger.debug("验证码图片预处理完成")
             return processed_image
@@ -130,6 +156,55 @@ class EnhancedCaptchaSolver:
             self.logger.error(f"验证码图片预处理失败: {e}")
             raise
     
+    def _sharpen(self, image: Image.Image) -> Image.Image:
+        """使用预先构建的3x3锐化核增强灰度图锐度"""
+        if cv2 is not None:
+            sharpened = cv2.filter2D(np.asarray(image), -1, self._sharp_kernel)
+            return Image.fromarray(sharpened)
+        return image.filter(self._sharp_filter)
+    
+    def _is_high_contrast(self, image: Image.Image) -> bool:
+        """
+        在约32x32的跨步采样上估计灰度均值和标准差，判断图片是否已足够清晰
+        
+        Args:
+            image: 原始PIL图像
+            
+        Returns:
+            标准差大于70且均值在[60, 200]之间时返回True
+        """
+        try:
+            gray = image if image.mode == 'L' else image.convert('L')
+            img_array = np.asarray(gray)
+            height, width = img_array.shape[:2]
+            sample = img_array[::max(1, height // 32), ::max(1, width // 32)]
+            return float(sample.std()) > 70 and 60 <= float(sample.mean()) <= 200
+        except Exception as e:
+            self.logger.debug("验证码图片质量探测失败: %s", e)
+            return False
+    
+    def _binarize(self, img_array: np.ndarray) -> np.ndarray:
+        """
+        灰度图二值化 - 优先使用OpenCV单次遍历，不可用时回退到numpy
+        
+        Args:
+            img_array: uint8灰度图数组
+            
+        Returns:
+            取值为0/255的uint8数组
+        """
+        if cv2 is not None:
+            if self._preprocess_config['otsu_threshold']:
+                _, binary_array = cv2.threshold(img_array, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+            else:
+                # 使用自适应阈值（灰度均值）
+                _, binary_array = cv2.threshold(img_array, float(img_array.mean()), 255, cv2.THRESH_BINARY)
+            return binary_array
+        
+        # 使用自适应阈值；布尔掩码直接乘以uint8，避免中间int64数组
+        threshold = img_array.mean()
+        return (img_array > threshold).astype(np.uint8) * np.uint8(255)
+    
     def _convert_to_pil(self, image: Union[bytes, Image.Image, str, Path]) -> Image.Image:
         """将各种格式转换为PIL图像"""
         if isinstance(image, Image.Image):
@@ -159,6 +234,9 @@ class EnhancedCaptchaSolver:
         self._recognition_stats['total_attempts'] += 1
         
         try:
+            if self._ocr is None:
+                self._init_ocr()
+            
             # 预处理图片
             if preprocess:
                 processed_image = self.preprocess_image(image)
@@ -174,8 +252,8 @@ class EnhancedCaptchaSolver:
                     # 转换为字节数据
                     img_bytes = self._pil_to_bytes(processed_image)
                     
-                    # 执行OCR识别
-                    raw_result = self._ocr.classification(img_bytes)
+                    # 执行OCR识别（相同的预处理结果直接命中缓存）
+                    raw_result = self._classify_cached(img_bytes)
                     
                     if raw_result and isinstance(raw_result, str):
                         # 清理和修正结果
@@ -185,7 +263,8 @@ class EnhancedCaptchaSolver:
                             # 计算置信度
                             confidence = self._calculate_confidence(cleaned_result, processed_image)
                             
-                            self.logger.debug(f"识别尝试 {attempt + 1}: '{raw_result}' -> '{cleaned_result}', 置信度: {confidence:.2f}")
+                            self.logger.debug("识别尝试 %d: '%s' -> '%s', 置信度: %.2f",
+                                              attempt + 1, raw_result, cleaned_result, confidence)
                             
                             if confidence > best_confidence:
                                 best_result = cleaned_result
@@ -196,7 +275,7 @@ class EnhancedCaptchaSolver:
                                 break
                 
                 except Exception as e:
-                    self.logger.warning(f"识别尝试 {attempt + 1} 失败: {e}")
+                    self.logger.warning("识别尝试 %d 失败: %s", attempt + 1, e)
                     continue
             
             if best_result and self._is_valid_4digit_number(best_result):
@@ -208,11 +287,11 @@ class EnhancedCaptchaSolver:
                     (current_avg * (total_success - 1) + best_confidence) / total_success
                 )
                 
-                self.logger.info(f"验证码识别成功: '{best_result}', 置信度: {best_confidence:.2f}")
+                self.logger.info("验证码识别成功: '%s', 置信度: %.2f", best_result, best_confidence)
                 return best_result
             else:
                 self._recognition_stats['failed_recognitions'] += 1
-                self.logger.warning(f"验证码识别失败: 最佳结果='{best_result}', 置信度={best_confidence:.2f}")
+                self.logger.warning("验证码识别失败: 最佳结果='%s', 置信度=%.2f", best_result, best_confidence)
                 return None
                 
         except Exception as e:
@@ -220,6 +299,20 @@ class EnhancedCaptchaSolver:
             self.logger.error(f"验证码识别过程出错: {e}")
             return None
     
+    def _classify_cached(self, img_bytes: bytes) -> str:
+        """执行OCR识别，按图片字节的blake2b摘要做LRU缓存"""
+        key = hashlib.blake2b(img_bytes, digest_size=8).digest()
+        cached = self._ocr_cache.get(key)
+        if cached is not None:
+            self._ocr_cache.move_to_end(key)
+            return cached
+        
+        raw_result = self._ocr.classification(img_bytes)
+        self._ocr_cache[key] = raw_result
+        if len(self._ocr_cache) > self._ocr_cache_size:
+            self._ocr_cache.popitem(last=False)
+        return raw_result
+    
     def _pil_to_bytes(self, image: Image.Image) -> bytes:
         """将PIL图像转换为字节数据"""
         img_bytes = io.BytesIO()
@@ -377,18 +470,16 @@ class EnhancedCaptchaSolver:
             
             save_dir.mkdir(parents=True, exist_ok=True)
             
-            # 生成唯一文件名
-            timestamp = int(time.time())
-            filename = f"failed_captcha_{timestamp}.png"
+            # 生成唯一文件名（纳秒时间戳 + 递增序号）
+            seq = next(self._failed_image_counter)
+            filename = f"failed_captcha_{time.time_ns()}_{seq}.png"
             filepath = save_dir / filename
             
-            # 转换并保存图片
+            # 字节数据直接写入，保留原始图片，避免解码再编码
             if isinstance(image, bytes):
-                pil_image = Image.open(io.BytesIO(image))
+                filepath.write_bytes(image)
             else:
-                pil_image = image
-                
-            pil_image.save(filepath, format='PNG')
+                image.save(filepath, format='PNG')
             
             self.logger.info(f"失败验证码图片已保存: {filepath}")
             return filepath
@@ -419,5 +510,14 @@ class EnhancedCaptchaSolver:
                 self.logger.warning(f"未知的预处理参数: {key}")
 
 
-# 创建增强版验证码识别器实例
-enhanced_captcha_solver = EnhancedCaptchaSolver()
\ No newline at end of file
+# 增强版验证码识别器实例 - 首次访问 enhanced_captcha_solver 时才创建
+_enhanced_captcha_solver: Optional[EnhancedCaptchaSolver] = None
+
+
+def __getattr__(name: str) -> Any:
+    global _enhanced_captcha_solver
+    if name == 'enhanced_captcha_solver':
+        if _enhanced_captcha_solver is None:
+            _enhanced_captcha_solver = EnhancedCaptchaSolver()
+        return _enhanced_captcha_solver
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
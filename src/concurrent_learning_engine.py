@@ -5,22 +5,43 @@
 """
 
 import asyncio
+import itertools
+from array import array
+import random
 import threading
 import time
 import logging
-from typing import Dict, List, Optional, Tuple, Set, Callable
-from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple, Set, Callable
+from collections import deque
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
-from queue import Queue, PriorityQueue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue, LifoQueue, Empty
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, wait
 import json
 from enum import Enum
-from threading import Lock, RLock
+from threading import Lock
 import weakref
 
 from src.pure_api_learner import PureAPILearner, CourseInfo, LearningSession
 
 
+# 工作线程计数器布局：每个线程占用 _COUNTER_STRIDE 个连续槽位，只由该线程写入
+_COUNTER_STRIDE = 8
+_CNT_TASKS_COMPLETED = 0
+_CNT_TASKS_FAILED = 1
+_CNT_COURSES_COMPLETED = 2
+_CNT_LEARNING_TIME_US = 3  # 学习时长（微秒）
+
+
+def _slotted(cls):
+    """按数据类字段为其重建带 __slots__ 的类（dataclass 的 slots 参数需要 Python 3.10+）"""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items()
+                 if k not in names and k not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
 class TaskPriority(Enum):
     """任务优先级"""
     URGENT = 1      # 紧急任务（快完成的课程）
@@ -39,79 +60,116 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"     # 已取消
 
 
+@_slotted
 @dataclass
 class LearningTask:
     """学习任务"""
-    task_id: str
+    task_id: int
     course: CourseInfo
     priority: TaskPriority
     status: TaskStatus = TaskStatus.PENDING
     progress: float = 0.0
-    start_time: Optional[datetime] = None
-    end_time: Optional[datetime] = None
+    start_time: Optional[float] = None  # time.monotonic() 秒
+    end_time: Optional[float] = None    # time.monotonic() 秒
     error_count: int = 0
     last_error: Optional[str] = None
     estimated_duration: int = 0  # 预估分钟数
     worker_thread_id: Optional[str] = None
+    _prio_int: int = field(init=False, repr=False)  # 缓存的优先级数值，入队时直接使用
 
     def __post_init__(self):
+        self._prio_int = self.priority.value
         if self.estimated_duration == 0:
             # 基于课程时长估算
             self.estimated_duration = max(1, self.course.duration_minutes - int(self.course.progress / 100 * self.course.duration_minutes))
 
 
+@_slotted
 @dataclass
 class WorkerStats:
     """工作线程统计"""
     thread_id: str
-    tasks_completed: int = 0
-    tasks_failed: int = 0
-    total_learning_time: float = 0.0
-    current_task: Optional[str] = None
-    last_activity: datetime = field(default_factory=datetime.now)
+    counter_base: int = 0  # 在引擎计数器数组中的起始槽位
+    current_task: Optional[int] = None
+    last_activity: float = field(default_factory=time.monotonic)  # time.monotonic() 秒
+
+
+@dataclass
+class PriorityShard:
+    """单个工作线程的任务分片：每个优先级一个先进先出队列 + 条件变量"""
+    buckets: List[Deque[int]] = field(default_factory=lambda: [deque() for _ in TaskPriority])
+    lock: Lock = field(default_factory=Lock)
+    cond: threading.Condition = field(init=False)
+
+    def __post_init__(self):
+        self.cond = threading.Condition(self.lock)
 
+    def pop_locked(self) -> Optional[int]:
+        """取出最高优先级桶中最早的任务（调用方需持有lock）"""
+        for bucket in self.buckets:
+            if bucket:
+                return bucket.popleft()
+        return None
 
+
+@_slotted
 @dataclass
 class EngineStats:
-    """引擎统计信息"""
+    """引擎统计信息（完成数、学习时长等计数在各工作线程的计数器槽位中，查询时汇总）"""
     total_tasks: int = 0
-    completed_tasks: int = 0
-    failed_tasks: int = 0
-    running_tasks: int = 0
-    total_learning_time: float = 0.0
     start_time: datetime = field(default_factory=datetime.now)
-    courses_completed: int = 0
     average_completion_rate: float = 0.0
 
 
 class ConcurrentLearningEngine:
-    """并发学习引擎"""
+    """
+    并发学习引擎
+
+    线程模型：每个工作线程独占一个已登录的 PureAPILearner，循环从优先级分片中取任务执行。
+    learn_course 基于阻塞的 requests 会话并按播放进度 sleep，属于I/O等待型负载，
+    线程在等待网络和sleep时释放GIL，因此这里使用线程池而不是 asyncio 事件循环。
+    工作线程数应按请求往返延迟和服务端承受能力来定，而不是CPU核数；若以后在学习流程中
+    加入CPU密集的处理（如大批量解析、签名计算），应提交到 ProcessPoolExecutor 执行，
+    不要放在工作线程里与其他线程争用GIL。
+    """
+
+    # 同一任务两次进度回调之间的最小间隔（秒），完成时总会回调
+    PROGRESS_CALLBACK_INTERVAL = 0.5
+
+    # 按进度档位（满足的阈值个数）查优先级
+    _REQUIRED_PRIORITY_TABLE = (TaskPriority.HIGH, TaskPriority.HIGH, TaskPriority.URGENT)
+    _ELECTIVE_PRIORITY_TABLE = (TaskPriority.LOW, TaskPriority.NORMAL, TaskPriority.URGENT)
 
     def __init__(self, max_workers: int = 3, username: str = None, password: str = None):
         """
         初始化并发学习引擎
 
         Args:
-            max_workers: 最大工作线程数（建议1-5个，避免过多请求）
+            max_workers: 最大工作线程数（I/O等待型，按网络延迟调整；超过5个时注意服务端请求压力）
             username: 登录用户名
             password: 登录密码
         """
-        self.max_workers = min(max_workers, 5)  # 限制最大线程数
+        self.max_workers = max(1, max_workers)
         self.username = username
         self.password = password
 
-        # 任务管理
-        self.task_queue = PriorityQueue()
-        self.tasks: Dict[str, LearningTask] = {}
-        self.running_tasks: Set[str] = set()
+        # 任务管理 - 每个工作线程一个优先级分片，空闲时从其他分片窃取任务
+        self.shards: List[PriorityShard] = [PriorityShard() for _ in range(self.max_workers)]
+        self._shard_rr = itertools.count()  # 入队分片轮询计数
+        self.tasks: Dict[int, LearningTask] = {}
+        self.running_tasks: Set[int] = set()
+        self._task_counter = itertools.count(1)  # 任务ID生成器
+        # 按状态划分的任务ID集合，随状态迁移增量维护，避免查询时全表扫描
+        self._by_status: Dict[TaskStatus, Set[int]] = {status: set() for status in TaskStatus}
 
         # 线程管理
         self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
         self.workers: Dict[str, WorkerStats] = {}
+        self._worker_counters = array('Q', [0]) * (self.max_workers * _COUNTER_STRIDE)
+        self._worker_futures: List[Future] = []
 
         # 同步控制
-        self.task_lock = RLock()
-        self.stats_lock = Lock()
+        self.task_lock = Lock()
 
         # 统计信息
         self.stats = EngineStats()
@@ -124,13 +182,24 @@ class ConcurrentLearningEngine:
         self.on_task_completed: Optional[Callable] = None
         self.on_task_failed: Optional[Callable] = None
         self.on_progress_update: Optional[Callable] = None
+        self._last_progress_callback: Dict[int, float] = {}
 
         # 日志
         self.logger = self._setup_logger()
+        if self.max_workers > 5:
+            self.logger.warning(f"工作线程数为 {self.max_workers}，请确认服务端能承受相应的并发请求")
+
+        # API学习器池（start时预先登录），只负责分发初始学习器；
+        # 每个工作线程在整个生命周期内独占一个学习器，stop()时统一关闭
+        self.learner_pool: LifoQueue = LifoQueue(maxsize=self.max_workers * 2)
+        self._active_learners: Dict[str, PureAPILearner] = {}
 
-        # API学习器池
-        self.learner_pool: List[PureAPILearner] = []
-        self.pool_lock = Lock()
+    @staticmethod
+    def _monotonic_to_iso(timestamp: Optional[float]) -> Optional[str]:
+        """将 time.monotonic() 时间戳换算为墙上时间的ISO字符串，仅在生成状态报告时调用"""
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(time.time() - (time.monotonic() - timestamp)).isoformat()
 
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
@@ -143,23 +212,45 @@ class ConcurrentLearningEngine:
             logger.setLevel(logging.INFO)
         return logger
 
-    def _get_learner(self) -> PureAPILearner:
-        """从池中获取API学习器实例"""
-        with self.pool_lock:
-            if self.learner_pool:
-                return self.learner_pool.pop()
-            else:
-                # 创建新的学习器实例
-                learner = PureAPILearner(self.username, self.password)
-                return learner
+    def _prewarm_learners(self) -> int:
+        """
+        预先创建并登录学习器，补足到工作线程数
+
+        Returns:
+            int: 池中可用的已登录学习器数量
+        """
+        while self.learner_pool.qsize() < self.max_workers:
+            learner = PureAPILearner(self.username, self.password)
+            if not learner.login():
+                self.logger.error("学习器预登录失败")
+                break
+            self.learner_pool.put(learner)
+        return self.learner_pool.qsize()
 
-    def _return_learner(self, learner: PureAPILearner):
-        """归还API学习器到池中"""
-        with self.pool_lock:
-            if len(self.learner_pool) < self.max_workers * 2:
-                self.learner_pool.append(learner)
+    def _get_learner(self, timeout: float = 10.0) -> Optional[PureAPILearner]:
+        """从池中获取已登录的API学习器实例，超时仍无可用实例时返回None"""
+        try:
+            return self.learner_pool.get(timeout=timeout)
+        except Empty:
+            return None
 
-    def add_task(self, course: CourseInfo, priority: TaskPriority = TaskPriority.NORMAL) -> str:
+    def _close_learner(self, owner: str, learner: PureAPILearner):
+        """关闭单个学习器会话"""
+        try:
+            learner.close()
+        except Exception as e:
+            self.logger.warning(f"关闭{owner}的学习器失败: {e}")
+
+    def _close_learners(self):
+        """关闭池中未分配给工作线程的学习器（工作线程持有的学习器由该线程退出时自行关闭）"""
+        while True:
+            try:
+                learner = self.learner_pool.get_nowait()
+            except Empty:
+                break
+            self._close_learner("学习器池", learner)
+
+    def add_task(self, course: CourseInfo, priority: TaskPriority = TaskPriority.NORMAL) -> int:
         """
         添加学习任务
 
@@ -168,9 +259,9 @@ class ConcurrentLearningEngine:
             priority: 任务优先级
 
         Returns:
-            str: 任务ID
+            int: 任务ID
         """
-        task_id = f"{course.course_type}_{course.course_id}_{int(time.time())}"
+        task_id = next(self._task_counter)
 
         task = LearningTask(
             task_id=task_id,
@@ -179,15 +270,118 @@ class ConcurrentLearningEngine:
         )
 
         with self.task_lock:
-            self.tasks[task_id] = task
-            # 使用优先级值作为队列优先级（数值越小优先级越高）
-            self.task_queue.put((priority.value, task_id))
-            self.stats.total_tasks += 1
+            self._register_tasks_locked([task])
+
+        self._push_tasks([task])
 
         self.logger.info(f"已添加任务: {course.course_name} (优先级: {priority.name})")
         return task_id
 
-    def add_courses(self, courses: List[CourseInfo], auto_prioritize: bool = True) -> List[str]:
+    def _set_status(self, task: LearningTask, status: TaskStatus):
+        """迁移任务状态并同步状态集合（调用方需持有task_lock）"""
+        if task.task_id in self.tasks:
+            self._by_status[task.status].discard(task.task_id)
+            self._by_status[status].add(task.task_id)
+        task.status = status
+
+    def retry_failed_tasks(self, max_error_count: int, retry_delay: timedelta) -> List[LearningTask]:
+        """
+        将满足重试条件的失败任务重置为等待状态并重新入队
+
+        Args:
+            max_error_count: 允许重试的最大失败次数（不含）
+            retry_delay: 失败后至少间隔多久才重试
+
+        Returns:
+            List[LearningTask]: 本次重新入队的任务
+        """
+        current_time = time.monotonic()
+        retry_delay_seconds = retry_delay.total_seconds()
+        retried = []
+
+        with self.task_lock:
+            for task_id in list(self._by_status[TaskStatus.FAILED]):
+                task = self.tasks[task_id]
+                if (task.error_count < max_error_count and
+                    task.end_time and
+                    current_time - task.end_time > retry_delay_seconds):
+
+                    # 重置任务状态
+                    self._set_status(task, TaskStatus.PENDING)
+                    task.start_time = None
+                    task.end_time = None
+                    task.worker_thread_id = None
+                    retried.append(task)
+
+        self._push_tasks(retried)
+
+        return retried
+
+    def _register_tasks_locked(self, tasks: List[LearningTask]):
+        """登记新任务（调用方需持有task_lock）"""
+        for task in tasks:
+            self.tasks[task.task_id] = task
+            self._by_status[task.status].add(task.task_id)
+        self.stats.total_tasks += len(tasks)
+
+    def _push_tasks(self, tasks: List[LearningTask]):
+        """按轮询把任务分配到各分片入队，每个分片只加一次锁并唤醒其工作线程"""
+        shard_count = len(self.shards)
+        shard_tasks: List[List[LearningTask]] = [[] for _ in range(shard_count)]
+        for task in tasks:
+            shard_tasks[next(self._shard_rr) % shard_count].append(task)
+
+        for shard, pending in zip(self.shards, shard_tasks):
+            if not pending:
+                continue
+            with shard.cond:
+                for task in pending:
+                    # 优先级值从1开始，数值越小优先级越高
+                    shard.buckets[task._prio_int - 1].append(task.task_id)
+                shard.cond.notify(len(pending))
+
+    def _pop_task(self, shard_index: int, timeout: float) -> Optional[int]:
+        """
+        获取下一个任务：先取自己的分片，为空时从随机起点依次窃取其他分片，都为空则在自己的分片上等待
+
+        跨分片只保证近似优先级顺序（取到的是某个分片内的最高优先级任务），
+        以此换取各工作线程之间几乎没有锁竞争。
+
+        Args:
+            shard_index: 工作线程对应的分片下标
+            timeout: 等待新任务的最长秒数
+
+        Returns:
+            Optional[int]: 任务ID，超时无任务时返回None
+        """
+        own = self.shards[shard_index]
+        with own.lock:
+            task_id = own.pop_locked()
+        if task_id is not None:
+            return task_id
+
+        # 随机化窃取起点，避免空闲线程同时争抢同一个分片
+        shard_count = len(self.shards)
+        start = random.randrange(shard_count)
+        for offset in range(shard_count):
+            peer_index = (start + offset) % shard_count
+            if peer_index == shard_index:
+                continue
+            peer = self.shards[peer_index]
+            with peer.lock:
+                task_id = peer.pop_locked()
+            if task_id is not None:
+                return task_id
+
+        # 入队或stop()会通过条件变量唤醒，超时只作为兜底
+        with own.cond:
+            task_id = own.pop_locked()
+            if task_id is None and not self.should_stop:
+                own.cond.wait(timeout)
+                task_id = own.pop_locked()
+        return task_id
+
+    def add_courses(self, courses: List[CourseInfo], auto_prioritize: bool = True) -> List[int]:
         """
         批量添加课程任务
 
@@ -196,41 +390,42 @@ class ConcurrentLearningEngine:
             auto_prioritize: 是否自动设置优先级
 
         Returns:
-            List[str]: 任务ID列表
+            List[int]: 任务ID列表
         """
-        task_ids = []
+        # 先过滤掉已完成课程，再为剩余课程批量计算优先级
+        todo = [course for course in courses if course.progress < 100]
+        skipped = len(courses) - len(todo)
+        if skipped:
+            self.logger.info(f"跳过 {skipped} 门已完成课程")
+
+        if auto_prioritize:
+            priorities = list(map(self._calculate_priority, todo))
+        else:
+            priorities = [TaskPriority.NORMAL] * len(todo)
 
-        for course in courses:
-            if course.progress >= 100:
-                self.logger.info(f"跳过已完成课程: {course.course_name}")
-                continue
+        task_counter = self._task_counter
+        new_tasks = [
+            LearningTask(task_id=next(task_counter), course=course, priority=priority)
+            for course, priority in zip(todo, priorities)
+        ]
 
-            if auto_prioritize:
-                priority = self._calculate_priority(course)
-            else:
-                priority = TaskPriority.NORMAL
+        # 一次加锁登记全部任务，再按分片批量入队
+        with self.task_lock:
+            self._register_tasks_locked(new_tasks)
 
-            task_id = self.add_task(course, priority)
-            task_ids.append(task_id)
+        self._push_tasks(new_tasks)
 
-        return task_ids
+        self.logger.info(f"已批量添加 {len(new_tasks)} 个任务")
+        return [task.task_id for task in new_tasks]
 
     def _calculate_priority(self, course: CourseInfo) -> TaskPriority:
         """根据课程信息自动计算优先级"""
-        # 必修课优先级较高
+        progress = course.progress
         if course.course_type == 'required':
-            if course.progress >= 80:
-                return TaskPriority.URGENT  # 接近完成的必修课最优先
-            else:
-                return TaskPriority.HIGH
-        else:
-            # 选修课根据进度决定
-            if course.progress >= 90:
-                return TaskPriority.URGENT  # 接近完成的优先
-            elif course.progress >= 50:
-                return TaskPriority.NORMAL
-            else:
-                return TaskPriority.LOW
+            # 必修课优先级较高，接近完成（>=80%）的最优先
+            return self._REQUIRED_PRIORITY_TABLE[(progress >= 50) + (progress >= 80)]
+        # 选修课根据进度决定：<50% 低，50%-90% 普通，>=90% 紧急
+        return self._ELECTIVE_PRIORITY_TABLE[(progress >= 50) + (progress >= 90)]
 
     def start(self):
         """启动并发学习引擎"""
@@ -238,16 +433,27 @@ class ConcurrentLearningEngine:
             self.logger.warning("学习引擎已在运行")
             return
 
+        worker_count = self._prewarm_learners()
+        if worker_count == 0:
+            self.logger.error("没有可用的已登录学习器，无法启动学习引擎")
+            return
+
         self.is_running = True
         self.should_stop = False
         self.stats.start_time = datetime.now()
 
-        self.logger.info(f"🚀 启动并发学习引擎 (工作线程数: {self.max_workers})")
+        self.logger.info(f"🚀 启动并发学习引擎 (工作线程数: {worker_count})")
+
+        # 在线程启动前建好统计表，之后不再修改字典结构，读取时无需加锁
+        self.workers = {
+            f"worker_{i}": WorkerStats(thread_id=f"worker_{i}", counter_base=i * _COUNTER_STRIDE)
+            for i in range(worker_count)
+        }
 
-        # 提交所有工作线程
-        for i in range(self.max_workers):
-            future = self.executor.submit(self._worker_thread, f"worker_{i}")
-            # 不需要存储future，让它们自由运行
+        # 提交所有工作线程（每个线程占用一个已登录的学习器）
+        self._worker_futures = [
+            self.executor.submit(self._worker_thread, i) for i in range(worker_count)
+        ]
 
     def stop(self, timeout: float = 30.0):
         """停止并发学习引擎"""
@@ -257,33 +463,43 @@ class ConcurrentLearningEngine:
         self.logger.info("⏹️ 正在停止并发学习引擎...")
         self.should_stop = True
 
+        # 唤醒所有在分片上等待任务的工作线程，使其立即退出
+        for shard in self.shards:
+            with shard.cond:
+                shard.cond.notify_all()
+
         # 等待所有任务完成或超时
-        self.executor.shutdown(wait=True, timeout=timeout)
+        wait(self._worker_futures, timeout=timeout)
+        self.executor.shutdown(wait=False)
+        # 只关闭池中空闲的学习器；超时未退出的工作线程会在退出时关闭自己的学习器
+        self._close_learners()
 
         self.is_running = False
         self.logger.info("✅ 并发学习引擎已停止")
 
-    def _worker_thread(self, thread_id: str):
+    def _worker_thread(self, shard_index: int):
         """工作线程主循环"""
-        with self.stats_lock:
-            self.workers[thread_id] = WorkerStats(thread_id=thread_id)
-
+        thread_id = f"worker_{shard_index}"
         worker_stats = self.workers[thread_id]
+        counters = self._worker_counters
+        counter_base = worker_stats.counter_base
         self.logger.info(f"🔄 工作线程 {thread_id} 已启动")
 
+        learner = None
         try:
-            # 获取学习器实例
+            # 获取已登录的学习器实例
             learner = self._get_learner()
-
-            # 登录
-            if not learner.login():
-                self.logger.error(f"工作线程 {thread_id} 登录失败")
+            if learner is None:
+                self.logger.error(f"工作线程 {thread_id} 没有可用的学习器")
                 return
+            self._active_learners[thread_id] = learner
 
             while not self.should_stop:
                 try:
-                    # 从队列获取任务（超时1秒）
-                    priority, task_id = self.task_queue.get(timeout=1.0)
+                    # 从分片获取任务（无任务时最多等待1秒）
+                    task_id = self._pop_task(shard_index, timeout=1.0)
+                    if task_id is None:
+                        continue
 
                     with self.task_lock:
                         if task_id not in self.tasks:
@@ -294,12 +510,11 @@ class ConcurrentLearningEngine:
                             continue
 
                         # 标记任务为运行状态
-                        task.status = TaskStatus.RUNNING
-                        task.start_time = datetime.now()
+                        self._set_status(task, TaskStatus.RUNNING)
+                        task.start_time = time.monotonic()
                         task.worker_thread_id = thread_id
                         self.running_tasks.add(task_id)
                         worker_stats.current_task = task_id
-                        self.stats.running_tasks += 1
 
                     self.logger.info(f"🎓 [{thread_id}] 开始学习: {task.course.course_name}")
 
@@ -308,70 +523,70 @@ class ConcurrentLearningEngine:
 
                     # 更新任务状态
                     with self.task_lock:
-                        task.end_time = datetime.now()
+                        task.end_time = time.monotonic()
                         self.running_tasks.discard(task_id)
                         worker_stats.current_task = None
-                        self.stats.running_tasks -= 1
 
                         if success:
-                            task.status = TaskStatus.COMPLETED
-                            worker_stats.tasks_completed += 1
-                            self.stats.completed_tasks += 1
+                            self._set_status(task, TaskStatus.COMPLETED)
+                        else:
+                            self._set_status(task, TaskStatus.FAILED)
+                            task.error_count += 1
 
-                            if task.course.progress >= 100:
-                                self.stats.courses_completed += 1
+                    # 计数器槽位只由本线程写入；回调在锁外执行，回调中可以安全调用引擎方法
+                    if success:
+                        counters[counter_base + _CNT_TASKS_COMPLETED] += 1
 
-                            self.logger.info(f"✅ [{thread_id}] 完成学习: {task.course.course_name}")
+                        if task.course.progress >= 100:
+                            counters[counter_base + _CNT_COURSES_COMPLETED] += 1
 
-                            if self.on_task_completed:
-                                try:
-                                    self.on_task_completed(task)
-                                except Exception as e:
-                                    self.logger.error(f"任务完成回调异常: {e}")
-                        else:
-                            task.status = TaskStatus.FAILED
-                            task.error_count += 1
-                            worker_stats.tasks_failed += 1
-                            self.stats.failed_tasks += 1
+                        self.logger.info(f"✅ [{thread_id}] 完成学习: {task.course.course_name}")
+
+                        if self.on_task_completed:
+                            try:
+                                self.on_task_completed(task)
+                            except Exception as e:
+                                self.logger.error(f"任务完成回调异常: {e}")
+                    else:
+                        counters[counter_base + _CNT_TASKS_FAILED] += 1
 
-                            self.logger.error(f"❌ [{thread_id}] 学习失败: {task.course.course_name}")
+                        self.logger.error(f"❌ [{thread_id}] 学习失败: {task.course.course_name}")
 
-                            if self.on_task_failed:
-                                try:
-                                    self.on_task_failed(task)
-                                except Exception as e:
-                                    self.logger.error(f"任务失败回调异常: {e}")
+                        if self.on_task_failed:
+                            try:
+                                self.on_task_failed(task)
+                            except Exception as e:
+                                self.logger.error(f"任务失败回调异常: {e}")
 
-                        worker_stats.last_activity = datetime.now()
+                    worker_stats.last_activity = time.monotonic()
 
                 except Exception as e:
-                    if "Empty" not in str(e):  # 忽略队列为空的异常
-                        self.logger.debug(f"工作线程 {thread_id} 等待任务: {e}")
-                    time.sleep(0.1)
+                    self.logger.error(f"工作线程 {thread_id} 处理任务异常: {e}")
 
         except Exception as e:
             self.logger.error(f"工作线程 {thread_id} 异常: {e}")
         finally:
-            # 归还学习器
-            try:
-                self._return_learner(learner)
-            except:
-                pass
+            # 学习器由本线程独占到退出，退出时由本线程关闭，避免 stop() 超时后关闭仍在使用的会话
+            if learner is not None:
+                self._active_learners.pop(thread_id, None)
+                self._close_learner(f"工作线程 {thread_id} ", learner)
             self.logger.info(f"⏹️ 工作线程 {thread_id} 已停止")
 
     def _execute_learning_task(self, learner: PureAPILearner, task: LearningTask, worker_stats: WorkerStats) -> bool:
         """执行学习任务"""
         try:
-            start_time = time.time()
+            start_time = time.monotonic()
 
             # 开始学习课程
-            success = learner.learn_course(task.course)
+            success = learner.learn_course(
+                task.course,
+                progress_callback=lambda progress: self._on_progress_update(task, progress)
+            )
 
-            end_time = time.time()
+            end_time = time.monotonic()
             learning_time = end_time - start_time
 
-            worker_stats.total_learning_time += learning_time
-            self.stats.total_learning_time += learning_time
+            self._worker_counters[worker_stats.counter_base + _CNT_LEARNING_TIME_US] += int(learning_time * 1_000_000)
 
             return success
 
@@ -381,11 +596,22 @@ class ConcurrentLearningEngine:
             return False
 
     def _on_progress_update(self, task: LearningTask, progress: float):
-        """处理学习进度更新"""
+        """处理学习进度更新（进度只增不减）"""
+        progress = max(progress, task.course.progress)
         task.progress = progress
         task.course.progress = progress
 
         if self.on_progress_update:
+            # 合并高频的中间进度，避免回调风暴
+            now = time.monotonic()
+            if progress < 100:
+                last_time = self._last_progress_callback.get(task.task_id, float('-inf'))
+                if now - last_time < self.PROGRESS_CALLBACK_INTERVAL:
+                    return
+                self._last_progress_callback[task.task_id] = now
+            else:
+                self._last_progress_callback.pop(task.task_id, None)
+
             try:
                 self.on_progress_update(task, progress)
             except Exception as e:
@@ -394,10 +620,16 @@ class ConcurrentLearningEngine:
     def get_status(self) -> Dict:
         """获取引擎状态"""
         with self.task_lock:
-            pending_tasks = sum(1 for t in self.tasks.values() if t.status == TaskStatus.PENDING)
+            pending_tasks = len(self._by_status[TaskStatus.PENDING])
             running_tasks = len(self.running_tasks)
-            completed_tasks = sum(1 for t in self.tasks.values() if t.status == TaskStatus.COMPLETED)
-            failed_tasks = sum(1 for t in self.tasks.values() if t.status == TaskStatus.FAILED)
+            completed_tasks = len(self._by_status[TaskStatus.COMPLETED])
+            failed_tasks = len(self._by_status[TaskStatus.FAILED])
+
+        # 汇总各工作线程的计数（workers 在 start() 后不再变更结构）
+        worker_stats = list(self.workers.values())
+        counters = self._worker_counters
+        courses_completed = sum(counters[_CNT_COURSES_COMPLETED::_COUNTER_STRIDE])
+        total_learning_time = sum(counters[_CNT_LEARNING_TIME_US::_COUNTER_STRIDE]) / 1_000_000
 
         runtime = datetime.now() - self.stats.start_time
 
@@ -415,26 +647,26 @@ class ConcurrentLearningEngine:
                 "failed": failed_tasks
             },
             "workers": {
-                worker_id: {
-                    "tasks_completed": stats.tasks_completed,
-                    "tasks_failed": stats.tasks_failed,
-                    "total_learning_time": stats.total_learning_time,
+                stats.thread_id: {
+                    "tasks_completed": counters[stats.counter_base + _CNT_TASKS_COMPLETED],
+                    "tasks_failed": counters[stats.counter_base + _CNT_TASKS_FAILED],
+                    "total_learning_time": counters[stats.counter_base + _CNT_LEARNING_TIME_US] / 1_000_000,
                     "current_task": stats.current_task,
-                    "last_activity": stats.last_activity.isoformat()
+                    "last_activity": self._monotonic_to_iso(stats.last_activity)
                 }
-                for worker_id, stats in self.workers.items()
+                for stats in worker_stats
             },
             "performance": {
-                "courses_completed": self.stats.courses_completed,
-                "total_learning_time": self.stats.total_learning_time,
+                "courses_completed": courses_completed,
+                "total_learning_time": total_learning_time,
                 "average_task_time": (
-                    self.stats.total_learning_time / max(1, completed_tasks)
+                    total_learning_time / max(1, completed_tasks)
                     if completed_tasks > 0 else 0
                 )
             }
         }
 
-    def get_task_status(self, task_id: str) -> Optional[Dict]:
+    def get_task_status(self, task_id: int) -> Optional[Dict]:
         """获取特定任务状态"""
         with self.task_lock:
             if task_id not in self.tasks:
@@ -447,14 +679,14 @@ class ConcurrentLearningEngine:
                 "status": task.status.value,
                 "progress": task.progress,
                 "priority": task.priority.name,
-                "start_time": task.start_time.isoformat() if task.start_time else None,
-                "end_time": task.end_time.isoformat() if task.end_time else None,
+                "start_time": self._monotonic_to_iso(task.start_time),
+                "end_time": self._monotonic_to_iso(task.end_time),
                 "error_count": task.error_count,
                 "last_error": task.last_error,
                 "worker_thread_id": task.worker_thread_id
             }
 
-    def cancel_task(self, task_id: str) -> bool:
+    def cancel_task(self, task_id: int) -> bool:
         """取消任务"""
         with self.task_lock:
             if task_id not in self.tasks:
@@ -467,28 +699,29 @@ class ConcurrentLearningEngine:
 
             if task.status == TaskStatus.RUNNING:
                 # 正在运行的任务无法直接取消，只能标记
-                task.status = TaskStatus.CANCELLED
+                self._set_status(task, TaskStatus.CANCELLED)
                 self.logger.warning(f"任务 {task_id} 将在完成当前操作后取消")
                 return True
             else:
-                task.status = TaskStatus.CANCELLED
+                self._set_status(task, TaskStatus.CANCELLED)
                 self.logger.info(f"已取消任务: {task_id}")
                 return True
 
-    def pause_task(self, task_id: str) -> bool:
+    def pause_task(self, task_id: int) -> bool:
         """暂停任务（实际上是取消，因为任务无法真正暂停）"""
         return self.cancel_task(task_id)
 
     def clear_completed_tasks(self):
         """清理已完成的任务"""
         with self.task_lock:
-            completed_tasks = [
-                task_id for task_id, task in self.tasks.items()
-                if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
-            ]
+            completed_tasks = []
+            for status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+                completed_tasks.extend(self._by_status[status])
+                self._by_status[status].clear()
 
             for task_id in completed_tasks:
                 del self.tasks[task_id]
+                self._last_progress_callback.pop(task_id, None)
 
         self.logger.info(f"已清理 {len(completed_tasks)} 个完成的任务")
 
@@ -1,20 +1,178 @@
-from playwright.sync_api import Page
+from playwright.sync_api import ElementHandle, Error as PlaywrightError, Page, TimeoutError as PlaywrightTimeoutError
+import copy
+import functools
 import logging
 import re
 import time
-from urllib.parse import urlparse, parse_qs
-from typing import List, Dict
-import hashlib
+from typing import List, Dict, Optional
+from urllib.parse import unquote
+import zlib
 from config.config import Config
 from src.database import db
 
+# 站点地址常量，避免在每个URL构造分支中重复计算
+_BASE_URL = Config.BASE_URL.rstrip('#/')
+_SITE_ORIGIN = '/'.join(Config.BASE_URL.split('/')[:3])
+_VIDEO_PAGE_TMPL = _BASE_URL + "#/video_page?user_course_id={}"
+
+# 预编译的正则表达式，避免在逐行解析时重复查找缓存
+_PROGRESS_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+_ID_RE = re.compile(r'id=(\d+)')
+_ONCLICK_ID_RE = re.compile(r"['\"](\d+)['\"]")
+_UCID_RE = re.compile(r'[?&]user_course_id=([^&#]+)')
+_NAV_TEXT_RE = re.compile('登录|首页|退出|帮助')
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_hash(text: str) -> str:
+    """生成8位十六进制的课程合成ID（非加密用途，使用crc32）"""
+    return format(zlib.crc32(text.encode('utf-8')), '08x')
+
 class CourseParser:
+    # 使用XPath一次遍历定位元素，替代多个 :has-text 伪类的组合扫描
+    _CONTINUE_BUTTON_XPATH = 'xpath=//*[(self::div and contains(@class,"btn")) or self::button or self::a][contains(.,"继续学习")]'
+    # 只匹配自身文本节点包含"播放"的span，不会命中外层包裹的span
+    _PLAY_SPAN_XPATH = 'xpath=.//span[text()[contains(.,"播放")]]'
+
+    # 页面内容就绪的标志元素
+    _REQUIRED_READY_SELECTOR = 'div.btn:has-text("继续学习"), a[href*="course_detail"], tbody tr'
+    _ELECTIVE_READY_SELECTOR = 'tbody tr td.td_title'
+
+    # 备用策略只查询一次 a[href]，再按href关键字在Python中过滤
+    _COURSE_LINK_KEYWORDS = ('course_detail', 'video_page', 'study', 'learn')
+    _ELECTIVE_LINK_KEYWORDS = ('video_page', 'study', 'learn')
+
+    # _extract_course_info 使用的合并选择器，每类信息只遍历一次DOM
+    _NAME_SELECTOR = '.course-title, .course-name, h3, h4, [class*="title"], [class*="name"]'
+    _PROGRESS_SELECTOR = '[class*="progress"], [class*="percent"], :text-matches("[0-9]+%"), span:has-text("%")'
+    _PAGE_PROGRESS_SELECTOR = _PROGRESS_SELECTOR + ', .video-progress, #progress'
+    _LINK_KEYWORDS = ('video_page', 'study', 'course')
+    _INNER_TEXTS_JS = "els => els.map(e => e.innerText || '')"
+    _HREFS_JS = "els => els.map(a => a.getAttribute('href'))"
+
+    # 一次 evaluate_all 取回所有链接的href和文本
+    _LINK_ATTRS_JS = "els => els.map(a => ({href: a.getAttribute('href'), text: (a.innerText || '').trim()}))"
+
+    # 一次 evaluate_all 批量提取"继续学习"按钮所在课程的信息，避免逐个元素往返调用
+    _REQUIRED_BUTTON_ROWS_JS = """els => els
+        .map(el => {
+            const li = el.closest('li');
+            if (!li) return null;
+            const title = li.querySelector('p.text_title');
+            return {
+                name: title ? title.innerText.trim() : '',
+                progressTexts: Array.from(li.querySelectorAll('.el-progress__text'), p => p.innerText.trim()),
+                href: el.getAttribute('href'),
+                onclick: el.getAttribute('onclick'),
+                dataId: el.getAttribute('data-id')
+            };
+        })
+        .filter(Boolean)"""
+
+    # 批量提取表格行的前三列文本及行内"继续学习"按钮信息
+    _REQUIRED_TABLE_ROWS_JS = """() => Array.from(document.querySelectorAll('tbody tr, .el-table__row')).map(row => {
+            const cells = row.querySelectorAll('td, .el-table__cell');
+            const button = Array.from(row.querySelectorAll('button, a'))
+                .find(el => (el.innerText || '').includes('继续学习'));
+            return {
+                cellCount: cells.length,
+                cellTexts: Array.from(cells).slice(0, 3).map(c => c.innerText.trim()),
+                hasButton: !!button,
+                href: button ? button.getAttribute('href') : null,
+                onclick: button ? button.getAttribute('onclick') : null
+            };
+        })"""
+
+    # 批量提取选修课表格行的课程名称、进度及播放元素
+    _ELECTIVE_TABLE_ROWS_JS = """() => Array.from(document.querySelectorAll('tbody tr')).map(row => {
+            const title = row.querySelector('td.td_title');
+            const progress = row.querySelector('.el-progress__text');
+            const playCell = row.querySelector('td.course_btn');
+            const hasPlay = !!playCell && Array.from(playCell.querySelectorAll('span'))
+                .some(span => Array.from(span.childNodes)
+                    .some(node => node.nodeType === Node.TEXT_NODE && node.textContent.includes('播放')));
+            return {
+                name: title ? title.innerText.trim() : '',
+                progressText: progress ? progress.innerText.trim() : '',
+                hasPlay: hasPlay
+            };
+        })"""
+
     def __init__(self, page: Page):
         self.page = page
         self.logger = logging.getLogger(__name__)
+        # parse_all_courses 结果缓存，避免短时间内重复抓取页面
+        self._cache = None
+        self._cache_ts = 0.0
+        # 常驻的请求监听器，记录最近一次视频页面请求的URL，避免每次点击都注册/移除
+        self._last_video_page_url = None
+        self.page.on('request', self._record_video_page_request)
+        # 在 self.page 上解析选修课时缓存的表格行句柄（课程名称 -> 行），页面跳转后失效
+        self._elective_row_handles: Dict[str, ElementHandle] = {}
+
+    def _record_video_page_request(self, request):
+        """记录视频页面请求的URL（点击选修课播放元素后读取）"""
+        if 'video_page' in request.url:
+            self._last_video_page_url = request.url
+            self.logger.debug("捕获到视频页面URL: %s", request.url)
+
+    @staticmethod
+    def _is_video_page_url(url: str) -> bool:
+        """判断URL是否为视频页面"""
+        return 'video_page' in url
+
+    def _video_url_for_id(self, user_course_id: str) -> str:
+        """根据user_course_id构造视频页面URL"""
+        return _VIDEO_PAGE_TMPL.format(user_course_id)
+
+    def _absolute_url(self, href: str) -> str:
+        """将站内hash路由链接转换为完整URL"""
+        if href.startswith('http'):
+            return href
+        return f"{_BASE_URL}#/{href.lstrip('#/')}"
     
+    def _text(self, root, selector: str) -> str:
+        """获取root（页面或元素句柄）下首个匹配元素的文本，不存在时返回空字符串"""
+        handle = root.query_selector(selector)
+        return handle.inner_text().strip() if handle else ''
+
+    def _attr(self, root, selector: str, name: str) -> Optional[str]:
+        """获取root（页面或元素句柄）下首个匹配元素的属性值，不存在时返回None"""
+        handle = root.query_selector(selector)
+        return handle.get_attribute(name) if handle else None
+
+    def _links_matching(self, page: Page, keywords) -> List[Dict]:
+        """一次取回页面中所有带href的链接，按关键字优先级返回第一个有匹配的关键字对应的链接"""
+        links = page.locator('a[href]').evaluate_all(self._LINK_ATTRS_JS)
+        for keyword in keywords:
+            matched = [link for link in links if keyword in link['href']]
+            if matched:
+                self.logger.info(f"使用关键字 '{keyword}' 找到 {len(matched)} 个链接")
+                return matched
+        return []
+
+    def _add_unique(self, courses: List[Dict], seen: set, course_info: Dict) -> bool:
+        """按 user_course_id（缺失时按课程名称）去重后添加课程，返回是否添加"""
+        key = course_info['user_course_id'] or course_info['course_name']
+        if key in seen:
+            return False
+        seen.add(key)
+        courses.append(course_info)
+        return True
+
+    def invalidate_cache(self):
+        """清除课程列表缓存，下次解析时重新抓取页面"""
+        self._cache = None
+        self._cache_ts = 0.0
+
     def parse_all_courses(self) -> Dict[str, List[Dict]]:
-        """解析所有课程（必修课和选修课）"""
+        """解析所有课程（必修课和选修课），在 Config.COURSE_CACHE_TTL 秒内复用上次结果"""
+        cache = self._cache
+        if (cache is not None and (cache['required'] or cache['elective'])
+                and time.monotonic() - self._cache_ts < Config.COURSE_CACHE_TTL):
+            self.logger.info("使用缓存的课程列表")
+            return copy.deepcopy(cache)
+        
         all_courses = {
             'required': [],
             'elective': []
@@ -33,6 +191,13 @@ class CourseParser:
             
             self.logger.info(f"课程解析完成 - 必修课: {len(required_courses)}门, 选修课: {len(elective_courses)}门")
             
+            # 各解析策略出错时返回空列表，全空的结果多半是未登录或抓取失败，不缓存以免掩盖问题
+            if required_courses or elective_courses:
+                self._cache = copy.deepcopy(all_courses)
+                self._cache_ts = time.monotonic()
+            else:
+                self.invalidate_cache()
+            
         except Exception as e:
             self.logger.error(f"课程解析失败: {str(e)}")
             
@@ -41,199 +206,31 @@ class CourseParser:
     def parse_required_courses(self) -> List[Dict]:
         """解析必修课程列表（网络培训班）"""
         courses = []
+        seen = set()
         
         try:
             # 访问必修课程页面
             self.logger.info("访问必修课程页面获取课程")
-            self.page.goto(Config.REQUIRED_COURSES_URL)
-            self.page.wait_for_load_state('domcontentloaded')
-            time.sleep(3)
+            self._elective_row_handles.clear()
+            self.page.goto(Config.REQUIRED_COURSES_URL, wait_until='domcontentloaded',
+                           timeout=Config.PAGE_LOAD_TIMEOUT)
             
-            # 等待页面完全加载
+            # 等待课程内容渲染，而不是固定等待
             try:
-                self.page.wait_for_selector('body', timeout=10000)
-            except:
-                pass
+                self.page.wait_for_selector(self._REQUIRED_READY_SELECTOR, state='attached',
+                                            timeout=Config.ELEMENT_WAIT_TIMEOUT)
+            except PlaywrightTimeoutError:
+                self.logger.warning("等待必修课程内容超时，继续尝试解析")
             
             self.logger.info("尝试多种选择器策略解析必修课程")
             
-            # 策略1：查找"继续学习"按钮对应的课程
-            continue_buttons = self.page.locator('div.btn:has-text("继续学习"), button:has-text("继续学习"), a:has-text("继续学习")').all()
-            self.logger.info(f"找到 {len(continue_buttons)} 个'继续学习'按钮")
-            
-            for button in continue_buttons:
-                try:
-                    # 查找按钮所在的列表项（li元素）
-                    parent_li = button.locator('xpath=ancestor::li[1]').first
-                    if parent_li.count() > 0:
-                        # 从同一li中提取课程名称
-                        course_name = ""
-                        title_element = parent_li.locator('p.text_title').first
-                        if title_element.count() > 0:
-                            course_name = title_element.inner_text().strip()
-                        
-                        # 提取学习进度
-                        progress = 0.0
-                        progress_elements = parent_li.locator('.el-progress__text').all()
-                        for progress_el in progress_elements:
-                            progress_text = progress_el.inner_text().strip()
-                            progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
-                            if progress_match:
-                                progress = float(progress_match.group(1))
-                                break
-                        
-                        # 获取按钮的点击链接或ID（目前这些按钮可能没有直接的href）
-                        href = button.get_attribute('href')
-                        onclick = button.get_attribute('onclick') 
-                        data_id = button.get_attribute('data-id')
-                        
-                        # 尝试构造视频链接
-                        video_url = ""
-                        user_course_id = ""
-                        
-                        if href:
-                            video_url = href if href.startswith('http') else Config.BASE_URL.rstrip('#/') + href.lstrip('#/')
-                        elif onclick:
-                            # 从onclick中提取ID或链接
-                            id_match = re.search(r'[\'""](\d+)[\'\""]', onclick)
-                            if id_match:
-                                user_course_id = id_match.group(1)
-                                video_url = f"{Config.BASE_URL.rstrip('#/')}#/video_page?user_course_id={user_course_id}"
-                        elif data_id:
-                            user_course_id = data_id
-                            video_url = f"{Config.BASE_URL.rstrip('#/')}#/video_page?user_course_id={data_id}"
-                        else:
-                            # 如果没有直接的链接信息，尝试用课程名称构造一个临时的URL
-                            # 这可能需要后续通过点击按钮来获取实际的链接
-                            video_url = f"{Config.BASE_URL.rstrip('#/')}#/course_study?name={course_name}"
-                        
-                        if course_name:
-                            # 生成课程ID（如果没有从其他地方获取）
-                            course_id = hashlib.md5(f"required_{course_name}".encode('utf-8')).hexdigest()[:8]
-                            
-                            course_info = {
-                                'course_name': course_name,
-                                'course_type': 'required',
-                                'progress': progress,
-                                'video_url': video_url,
-                                'user_course_id': user_course_id,
-                                'id': course_id  # 修复：添加缺失的 id 字段
-                            }
-                            courses.append(course_info)
-                            self.logger.debug(f"添加必修课: {course_name} (进度: {progress}%)")
-                        
-                except Exception as e:
-                    self.logger.warning(f"解析继续学习按钮时出错: {str(e)}")
-                    continue
-            
-            # 策略2：查找课程详情链接 (保留原有逻辑作为备用)
-            if not courses:
-                self.logger.info("策略1未找到课程，尝试策略2：查找课程详情链接")
-                course_detail_selectors = [
-                    'a[href*="course_detail"]',
-                    'a[href*="video_page"]',
-                    'a[href*="study"]',
-                    'a[href*="learn"]'
-                ]
-                
-                for selector in course_detail_selectors:
-                    course_links = self.page.locator(selector).all()
-                    self.logger.info(f"使用选择器 '{selector}' 找到 {len(course_links)} 个链接")
-                    
-                    if course_links:
-                        processed_course_ids = set()
-                        
-                        for link in course_links:
-                            try:
-                                href = link.get_attribute('href')
-                                text = link.inner_text().strip()
-                                
-                                if not href or not text or text == '加载中...':
-                                    continue
-                                
-                                # 提取course_id避免重复
-                                course_id_match = re.search(r'id=(\d+)', href)
-                                if course_id_match:
-                                    course_id = course_id_match.group(1)
-                                    if course_id in processed_course_ids:
-                                        continue
-                                    processed_course_ids.add(course_id)
-                                
-                                # 处理相对URL
-                                if href.startswith('#/'):
-                                    full_url = Config.BASE_URL.rstrip('#/') + href
-                                else:
-                                    full_url = href
-                                
-                                course_info = {
-                                    'course_name': text,
-                                    'course_type': 'required',
-                                    'progress': 0.0,
-                                    'video_url': full_url,
-                                    'user_course_id': course_id if course_id_match else '',
-                                    'id': course_id if course_id_match else hashlib.md5(f"required_{text}".encode('utf-8')).hexdigest()[:8]
-                                }
-                                
-                                courses.append(course_info)
-                                self.logger.debug(f"添加必修课: {text}")
-                                
-                            except Exception as e:
-                                self.logger.warning(f"解析课程详情链接时出错: {str(e)}")
-                                continue
-                        
-                        if courses:
-                            break
+            for strategy in (self._parse_required_strategy_1,
+                             self._parse_required_strategy_2,
+                             self._parse_required_strategy_3):
+                courses = strategy(self.page, seen)
+                if courses:
+                    break
             
-            # 策略3：解析表格行数据
-            if not courses:
-                self.logger.info("前两个策略未找到课程，尝试策略3：解析表格数据")
-                table_rows = self.page.locator('tbody tr, .el-table__row').all()
-                self.logger.info(f"找到 {len(table_rows)} 个表格行")
-                
-                for row in table_rows:
-                    try:
-                        cells = row.locator('td, .el-table__cell').all()
-                        if len(cells) >= 2:
-                            # 假设第一列或第二列是课程名称
-                            course_name = ""
-                            for cell in cells[:3]:
-                                cell_text = cell.inner_text().strip()
-                                if cell_text and len(cell_text) > 5 and '继续学习' not in cell_text:
-                                    course_name = cell_text
-                                    break
-                            
-                            # 查找该行中的继续学习按钮
-                            learn_button = row.locator('button:has-text("继续学习"), a:has-text("继续学习")').first
-                            if learn_button.count() > 0 and course_name:
-                                href = learn_button.get_attribute('href')
-                                onclick = learn_button.get_attribute('onclick')
-                                
-                                video_url = ""
-                                user_course_id = ""
-                                
-                                if href:
-                                    video_url = href if href.startswith('http') else Config.BASE_URL.rstrip('#/') + '/' + href.lstrip('#/')
-                                elif onclick:
-                                    id_match = re.search(r'[\'""](\d+)[\'\""]', onclick)
-                                    if id_match:
-                                        user_course_id = id_match.group(1)
-                                        video_url = f"{Config.BASE_URL.rstrip('#/')}#/video_page?user_course_id={user_course_id}"
-                                
-                                course_info = {
-                                    'course_name': course_name,
-                                    'course_type': 'required',
-                                    'progress': 0.0,
-                                    'video_url': video_url,
-                                    'user_course_id': user_course_id,
-                                    'id': user_course_id if user_course_id else hashlib.md5(f"required_{course_name}".encode('utf-8')).hexdigest()[:8]
-                                }
-                                courses.append(course_info)
-                                self.logger.debug(f"从表格添加必修课: {course_name}")
-                    
-                    except Exception as e:
-                        self.logger.warning(f"解析表格行时出错: {str(e)}")
-                        continue
-                        
         except Exception as e:
             self.logger.error(f"解析必修课程失败: {str(e)}")
             
@@ -243,210 +240,408 @@ class CourseParser:
     def parse_elective_courses(self) -> List[Dict]:
         """解析选修课程列表（单节课程）"""
         courses = []
+        seen = set()
         
         try:
             # 直接访问选修课页面
             self.logger.info("访问选修课页面获取课程")
-            self.page.goto(Config.ELECTIVE_COURSES_URL)
-            self.page.wait_for_load_state('domcontentloaded')
-            time.sleep(3)
+            page = self.page
+            self._elective_row_handles.clear()
+            page.goto(Config.ELECTIVE_COURSES_URL, wait_until='domcontentloaded',
+                      timeout=Config.PAGE_LOAD_TIMEOUT)
             
-            # 等待页面完全加载
+            # 等待课程表格渲染，而不是固定等待
             try:
-                self.page.wait_for_selector('body', timeout=10000)
-            except:
-                pass
+                page.wait_for_selector(self._ELECTIVE_READY_SELECTOR, state='attached',
+                                       timeout=Config.ELEMENT_WAIT_TIMEOUT)
+            except PlaywrightTimeoutError:
+                self.logger.warning("等待选修课程表格超时，继续尝试解析")
             
             self.logger.info("尝试多种选择器策略解析选修课程")
             
-            # 策略1：解析表格中的选修课程（选修课页面是表格形式）
-            table_rows = self.page.locator('tbody tr').all()
-            self.logger.info(f"找到 {len(table_rows)} 个表格行")
+            for strategy in (self._parse_elective_strategy_1,
+                             self._parse_elective_strategy_2):
+                courses = strategy(page, seen)
+                if courses:
+                    break
             
-            for row in table_rows:
-                try:
-                    # 获取课程名称（第一列，td.td_title）
-                    title_cell = row.locator('td.td_title').first
-                    if title_cell.count() == 0:
-                        continue
-                    
-                    course_name = title_cell.inner_text().strip()
-                    if not course_name or len(course_name) < 3:
-                        continue
-                    
-                    # 获取学习进度（第二列中的百分比）
-                    progress = 0.0
-                    progress_element = row.locator('.el-progress__text').first
-                    if progress_element.count() > 0:
-                        progress_text = progress_element.inner_text().strip()
-                        progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
-                        if progress_match:
-                            progress = float(progress_match.group(1))
-                    
-                    # 检查播放元素是否存在（选修课的"播放"是span元素，不是按钮）
-                    play_cell = row.locator('td.course_btn').first
-                    play_span = play_cell.locator('span:has-text("播放")').first if play_cell.count() > 0 else None
-                    has_play_element = play_span and play_span.count() > 0
-
-                    # 选修课需要通过点击播放元素来获取真实的视频URL
-                    # 这里先生成一个占位URL，实际使用时需要通过点击获取真实URL
-                    course_id = hashlib.md5(course_name.encode('utf-8')).hexdigest()[:8]
-                    user_course_id = hashlib.md5(course_name.encode('utf-8')).hexdigest()[8:16]
-
-                    # 标记需要点击获取真实URL的选修课
-                    video_url = f"#ELECTIVE_CLICK_TO_PLAY#{course_name}"
+        except Exception as e:
+            self.logger.error(f"解析选修课程失败: {str(e)}")
+            
+        self.logger.info(f"选修课解析完成，共获取到 {len(courses)} 门课程")
+        return courses
+
+    def _parse_required_strategy_1(self, page: Page, seen: set) -> List[Dict]:
+        """必修课策略1：查找"继续学习"按钮对应的课程"""
+        courses = []
+        
+        button_rows = page.locator(self._CONTINUE_BUTTON_XPATH).evaluate_all(self._REQUIRED_BUTTON_ROWS_JS)
+        self.logger.info(f"找到 {len(button_rows)} 个'继续学习'按钮")
+        
+        for row in button_rows:
+            try:
+                course_name = row['name']
+                
+                # 提取学习进度
+                progress = 0.0
+                for progress_text in row['progressTexts']:
+                    progress_match = _PROGRESS_RE.search(progress_text)
+                    if progress_match:
+                        progress = float(progress_match.group(1))
+                        break
+                
+                # 获取按钮的点击链接或ID（目前这些按钮可能没有直接的href）
+                href = row['href']
+                onclick = row['onclick']
+                data_id = row['dataId']
+                
+                # 尝试构造视频链接
+                video_url = ""
+                user_course_id = ""
+                
+                if href:
+                    video_url = self._absolute_url(href)
+                elif onclick:
+                    # 从onclick中提取ID或链接
+                    id_match = _ONCLICK_ID_RE.search(onclick)
+                    if id_match:
+                        user_course_id = id_match.group(1)
+                        video_url = self._video_url_for_id(user_course_id)
+                elif data_id:
+                    user_course_id = data_id
+                    video_url = self._video_url_for_id(data_id)
+                else:
+                    # 如果没有直接的链接信息，尝试用课程名称构造一个临时的URL
+                    # 这可能需要后续通过点击按钮来获取实际的链接
+                    video_url = f"{_BASE_URL}#/course_study?name={course_name}"
+                
+                if course_name:
+                    # 生成课程ID（如果没有从其他地方获取）
+                    course_id = _short_hash(f"required_{course_name}")
                     
                     course_info = {
                         'course_name': course_name,
-                        'course_type': 'elective',
+                        'course_type': 'required',
                         'progress': progress,
                         'video_url': video_url,
                         'user_course_id': user_course_id,
                         'id': course_id  # 修复：添加缺失的 id 字段
                     }
-                    
-                    courses.append(course_info)
-                    self.logger.debug(f"添加选修课: {course_name} (进度: {progress}%, 播放: {'是' if has_play_element else '否'})")
-                    
-                except Exception as e:
-                    self.logger.warning(f"解析表格行时出错: {str(e)}")
-                    continue
+                    if self._add_unique(courses, seen, course_info):
+                        self.logger.debug("添加必修课: %s (进度: %s%%)", course_name, progress)
             
-            # 策略2：如果策略1失败，尝试查找其他可能的课程元素
-            if not courses:
-                self.logger.info("策略1未找到课程，尝试策略2：查找其他课程元素")
-                alternative_selectors = [
-                    'a[href*="video_page"]',
-                    'a[href*="study"]',
-                    'a[href*="learn"]',
-                    'button:has-text("学习")',
-                    'button:has-text("观看")'
-                ]
+            except Exception as e:
+                self.logger.warning(f"解析继续学习按钮时出错: {str(e)}")
+                continue
+        
+        return courses
+    
+    def _parse_required_strategy_2(self, page: Page, seen: set) -> List[Dict]:
+        """必修课策略2：查找课程详情链接"""
+        courses = []
+        
+        self.logger.info("策略1未找到课程，尝试策略2：查找课程详情链接")
+        course_links = self._links_matching(page, self._COURSE_LINK_KEYWORDS)
+        self.logger.info(f"找到 {len(course_links)} 个课程相关链接")
+        
+        for link in course_links:
+            try:
+                href = link['href']
+                text = link['text']
                 
-                for selector in alternative_selectors:
-                    elements = self.page.locator(selector).all()
-                    self.logger.info(f"使用选择器 '{selector}' 找到 {len(elements)} 个元素")
-                    
-                    if elements:
-                        for element in elements:
-                            try:
-                                href = element.get_attribute('href')
-                                text = element.inner_text().strip()
-                                
-                                if not href or not text or len(text) < 3:
-                                    continue
-                                
-                                course_id_match = re.search(r'id=(\d+)', href) if href else None
-                                course_id = course_id_match.group(1) if course_id_match else ''
-                                
-                                if href and href.startswith('#/'):
-                                    full_url = Config.BASE_URL.rstrip('#/') + href
-                                else:
-                                    full_url = href or ''
-                                
-                                course_info = {
-                                    'course_name': text,
-                                    'course_type': 'elective',
-                                    'progress': 0.0,
-                                    'video_url': full_url,
-                                    'user_course_id': course_id,
-                                    'id': course_id if course_id else hashlib.md5(f"elective_{text}".encode('utf-8')).hexdigest()[:8]
-                                }
-                                
-                                courses.append(course_info)
-                                self.logger.debug(f"添加选修课: {text}")
-                                
-                            except Exception as e:
-                                self.logger.warning(f"解析选修课元素时出错: {str(e)}")
-                                continue
-                        
-                        if courses:
+                if not href or not text or text == '加载中...':
+                    continue
+                
+                course_id_match = _ID_RE.search(href)
+                course_id = course_id_match.group(1) if course_id_match else ''
+                
+                # 处理相对URL
+                if href.startswith('#/'):
+                    full_url = _BASE_URL + href
+                else:
+                    full_url = href
+                
+                course_info = {
+                    'course_name': text,
+                    'course_type': 'required',
+                    'progress': 0.0,
+                    'video_url': full_url,
+                    'user_course_id': course_id,
+                    'id': course_id if course_id else _short_hash(f"required_{text}")
+                }
+                
+                if self._add_unique(courses, seen, course_info):
+                    self.logger.debug("添加必修课: %s", text)
+            
+            except Exception as e:
+                self.logger.warning(f"解析课程详情链接时出错: {str(e)}")
+                continue
+        
+        return courses
+    
+    def _parse_required_strategy_3(self, page: Page, seen: set) -> List[Dict]:
+        """必修课策略3：解析表格行数据"""
+        courses = []
+        
+        self.logger.info("前两个策略未找到课程，尝试策略3：解析表格数据")
+        table_rows = page.evaluate(self._REQUIRED_TABLE_ROWS_JS)
+        self.logger.info(f"找到 {len(table_rows)} 个表格行")
+        
+        for row in table_rows:
+            try:
+                if row['cellCount'] >= 2:
+                    # 假设第一列或第二列是课程名称
+                    course_name = ""
+                    for cell_text in row['cellTexts']:
+                        if cell_text and len(cell_text) > 5 and '继续学习' not in cell_text:
+                            course_name = cell_text
                             break
                     
-        except Exception as e:
-            self.logger.error(f"解析选修课程失败: {str(e)}")
+                    # 该行中的继续学习按钮
+                    if row['hasButton'] and course_name:
+                        href = row['href']
+                        onclick = row['onclick']
+                        
+                        video_url = ""
+                        user_course_id = ""
+                        
+                        if href:
+                            video_url = self._absolute_url(href)
+                        elif onclick:
+                            id_match = _ONCLICK_ID_RE.search(onclick)
+                            if id_match:
+                                user_course_id = id_match.group(1)
+                                video_url = self._video_url_for_id(user_course_id)
+                        
+                        course_info = {
+                            'course_name': course_name,
+                            'course_type': 'required',
+                            'progress': 0.0,
+                            'video_url': video_url,
+                            'user_course_id': user_course_id,
+                            'id': user_course_id if user_course_id else _short_hash(f"required_{course_name}")
+                        }
+                        if self._add_unique(courses, seen, course_info):
+                            self.logger.debug("从表格添加必修课: %s", course_name)
             
-        self.logger.info(f"选修课解析完成，共获取到 {len(courses)} 门课程")
+            except Exception as e:
+                self.logger.warning(f"解析表格行时出错: {str(e)}")
+                continue
+        
+        return courses
+    
+    def _parse_elective_strategy_1(self, page: Page, seen: set) -> List[Dict]:
+        """选修课策略1：解析表格中的选修课程（选修课页面是表格形式）"""
+        courses = []
+        
+        table_rows = page.evaluate(self._ELECTIVE_TABLE_ROWS_JS)
+        self.logger.info(f"找到 {len(table_rows)} 个表格行")
+        
+        # 在 self.page 上解析时顺便缓存行句柄，之后点击播放无需重新扫描表格
+        if page is self.page and table_rows:
+            row_handles = page.query_selector_all('tbody tr')
+            if len(row_handles) == len(table_rows):
+                for row, handle in zip(table_rows, row_handles):
+                    if row['hasPlay'] and row['name']:
+                        self._elective_row_handles.setdefault(row['name'], handle)
+        
+        for row in table_rows:
+            try:
+                # 获取课程名称（第一列，td.td_title）
+                course_name = row['name']
+                if not course_name or len(course_name) < 3:
+                    continue
+                
+                # 获取学习进度（第二列中的百分比）
+                progress = 0.0
+                progress_match = _PROGRESS_RE.search(row['progressText'])
+                if progress_match:
+                    progress = float(progress_match.group(1))
+                
+                # 检查播放元素是否存在（选修课的"播放"是span元素，不是按钮）
+                has_play_element = row['hasPlay']
+                
+                # 选修课需要通过点击播放元素来获取真实的视频URL
+                # 这里先生成一个占位URL，实际使用时需要通过点击获取真实URL
+                course_id = _short_hash(course_name)
+                user_course_id = _short_hash(f"user_{course_name}")
+                
+                # 标记需要点击获取真实URL的选修课
+                video_url = f"#ELECTIVE_CLICK_TO_PLAY#{course_name}"
+                
+                course_info = {
+                    'course_name': course_name,
+                    'course_type': 'elective',
+                    'progress': progress,
+                    'video_url': video_url,
+                    'user_course_id': user_course_id,
+                    'id': course_id  # 修复：添加缺失的 id 字段
+                }
+                
+                if self._add_unique(courses, seen, course_info):
+                    self.logger.debug("添加选修课: %s (进度: %s%%, 播放: %s)", course_name, progress,
+                                      '是' if has_play_element else '否')
+            
+            except Exception as e:
+                self.logger.warning(f"解析表格行时出错: {str(e)}")
+                continue
+        
+        return courses
+    
+    def _parse_elective_strategy_2(self, page: Page, seen: set) -> List[Dict]:
+        """选修课策略2：查找其他可能的课程元素"""
+        courses = []
+        
+        self.logger.info("策略1未找到课程，尝试策略2：查找其他课程元素")
+        elements = self._links_matching(page, self._ELECTIVE_LINK_KEYWORDS)
+        self.logger.info(f"找到 {len(elements)} 个课程相关链接")
+        
+        for element in elements:
+            try:
+                href = element['href']
+                text = element['text']
+                
+                if not href or not text or len(text) < 3:
+                    continue
+                
+                course_id_match = _ID_RE.search(href)
+                course_id = course_id_match.group(1) if course_id_match else ''
+                
+                if href.startswith('#/'):
+                    full_url = _BASE_URL + href
+                else:
+                    full_url = href
+                
+                course_info = {
+                    'course_name': text,
+                    'course_type': 'elective',
+                    'progress': 0.0,
+                    'video_url': full_url,
+                    'user_course_id': course_id,
+                    'id': course_id if course_id else _short_hash(f"elective_{text}")
+                }
+                
+                if self._add_unique(courses, seen, course_info):
+                    self.logger.debug("添加选修课: %s", text)
+            
+            except Exception as e:
+                self.logger.warning(f"解析选修课元素时出错: {str(e)}")
+                continue
+        
         return courses
 
     def get_elective_real_video_url(self, course_name: str) -> str:
         """通过点击播放获取选修课的真实视频URL"""
+        return self.get_elective_real_video_urls([course_name]).get(course_name, "")
+
+    def get_elective_real_video_urls(self, course_names: List[str]) -> Dict[str, str]:
+        """批量获取选修课的真实视频URL，选修课列表页只加载一次
+        
+        Args:
+            course_names: 选修课名称列表
+            
+        Returns:
+            课程名称到视频URL的映射，获取失败的课程对应空字符串
+        """
+        video_urls = {}
+        if not course_names:
+            return video_urls
+        
         try:
-            # 访问选修课页面
-            self.page.goto(Config.ELECTIVE_COURSES_URL)
-            self.page.wait_for_load_state('domcontentloaded')
-            time.sleep(2)
+            # 刚在 self.page 上解析过选修课列表时，直接使用缓存的行句柄
+            if not (self._elective_row_handles and 'my_elective_courses' in self.page.url):
+                self._open_elective_list()
+            
+            for course_name in course_names:
+                # 点击播放后页面会跳转，返回列表页继续处理下一门课程
+                if 'my_elective_courses' not in self.page.url:
+                    self._open_elective_list(go_back=True)
+                video_urls[course_name] = self._click_elective_play(course_name)
+                
+        except Exception as e:
+            self.logger.error(f"获取选修课真实URL失败: {str(e)}")
+        
+        for course_name in course_names:
+            video_urls.setdefault(course_name, "")
+        return video_urls
 
-            # 查找对应课程的播放元素
-            table_rows = self.page.locator('tbody tr').all()
+    def _open_elective_list(self, go_back: bool = False):
+        """打开选修课列表页并等待表格渲染，go_back为True时优先通过浏览器后退返回"""
+        self._elective_row_handles.clear()
+        if go_back:
+            self.page.go_back(wait_until='domcontentloaded', timeout=Config.PAGE_LOAD_TIMEOUT)
+        if not go_back or 'my_elective_courses' not in self.page.url:
+            self.page.goto(Config.ELECTIVE_COURSES_URL, wait_until='domcontentloaded',
+                           timeout=Config.PAGE_LOAD_TIMEOUT)
+        try:
+            self.page.wait_for_selector(self._ELECTIVE_READY_SELECTOR, state='attached',
+                                        timeout=Config.ELEMENT_WAIT_TIMEOUT)
+        except PlaywrightTimeoutError:
+            self.logger.warning("等待选修课程表格超时，继续查找播放元素")
 
-            for row in table_rows:
-                try:
-                    # 获取课程名称
-                    title_cell = row.locator('td.td_title').first
-                    if title_cell.count() == 0:
-                        continue
+    def _elective_play_rows(self, course_name: str) -> List[ElementHandle]:
+        """返回课程对应的带播放元素的表格行，优先使用解析时缓存且仍在文档中的行句柄"""
+        cached_row = self._elective_row_handles.pop(course_name, None)
+        if cached_row is not None:
+            try:
+                if cached_row.evaluate('row => row.isConnected'):
+                    return [cached_row]
+            except Exception:
+                pass
+            self._elective_row_handles.clear()
 
-                    row_course_name = title_cell.inner_text().strip()
-                    if row_course_name != course_name:
-                        continue
+        # 一次 evaluate 读取所有行的课程名称，只为匹配的行取元素句柄
+        row_data = self.page.evaluate(self._ELECTIVE_TABLE_ROWS_JS)
+        row_indexes = [i for i, row in enumerate(row_data) if row['name'] == course_name and row['hasPlay']]
+        if not row_indexes:
+            return []
+        table_rows = self.page.query_selector_all('tbody tr')
+        return [table_rows[i] for i in row_indexes if i < len(table_rows)]
 
+    def _click_elective_play(self, course_name: str) -> str:
+        """在已加载的选修课列表页中点击课程的播放元素并返回视频URL"""
+        try:
+            for row in self._elective_play_rows(course_name):
+                try:
                     # 找到了对应的课程行，查找播放元素
-                    play_cell = row.locator('td.course_btn').first
-                    play_span = play_cell.locator('span:has-text("播放")').first
+                    play_cell = row.query_selector('td.course_btn')
+                    play_span = play_cell.query_selector(self._PLAY_SPAN_XPATH) if play_cell else None
 
-                    if play_span.count() > 0:
+                    if play_span:
                         self.logger.info(f"找到选修课 '{course_name}' 的播放元素，准备点击")
 
-                        # 拦截导航请求
+                        # 清除上一次记录的视频页面请求
                         navigation_url = None
-                        def capture_navigation(request):
-                            nonlocal navigation_url
-                            if 'video_page' in request.url:
-                                navigation_url = request.url
-                                self.logger.info(f"捕获到视频页面URL: {request.url}")
-
-                        self.page.on('request', capture_navigation)
+                        self._last_video_page_url = None
 
-                        # 点击播放元素
+                        # 点击播放元素，并精确等待跳转到视频页面（包括hash路由跳转）
                         try:
-                            # 尝试直接点击span
-                            play_span.click(timeout=5000)
-                            # 等待页面响应
-                            time.sleep(3)
-
-                            # 如果页面发生了导航，获取当前URL
-                            current_url = self.page.url
-                            if 'video_page' in current_url:
-                                navigation_url = current_url
+                            with self.page.expect_navigation(url=self._is_video_page_url, timeout=5000):
+                                play_span.click(timeout=5000)
+                            navigation_url = self.page.url
 
                         except Exception as click_error:
-                            self.logger.warning(f"点击播放元素失败: {click_error}")
+                            self.logger.warning(f"点击播放元素后未跳转到视频页面: {click_error}")
                             # 尝试点击整个单元格
                             try:
-                                play_cell.click(timeout=3000)
-                                time.sleep(2)
-                                current_url = self.page.url
-                                if 'video_page' in current_url:
-                                    navigation_url = current_url
-                            except:
+                                with self.page.expect_navigation(url=self._is_video_page_url, timeout=3000):
+                                    play_cell.click(timeout=3000)
+                                navigation_url = self.page.url
+                            except Exception:
                                 pass
 
-                        # 移除事件监听器
-                        try:
-                            self.page.remove_listener('request', capture_navigation)
-                        except:
-                            pass
-
+                        # 点击后页面可能已跳转，缓存的行句柄不再可用
+                        self._elective_row_handles.clear()
+                        navigation_url = navigation_url or self._last_video_page_url
                         if navigation_url:
                             self.logger.info(f"成功获取选修课 '{course_name}' 的真实URL: {navigation_url}")
                             return navigation_url
                         else:
                             self.logger.warning(f"点击播放后未获取到有效URL，使用备用方案")
                             # 使用备用URL格式
-                            course_id = hashlib.md5(course_name.encode('utf-8')).hexdigest()[:8]
-                            user_course_id = hashlib.md5(course_name.encode('utf-8')).hexdigest()[8:16]
-                            backup_url = f"{Config.BASE_URL.rstrip('#/')}#/video_page?id={course_id}&user_course_id={user_course_id}&name=%E5%AD%A6%E4%B9%A0%E4%B8%AD%E5%BF%83"
+                            course_id = _short_hash(course_name)
+                            user_course_id = _short_hash(f"user_{course_name}")
+                            backup_url = f"{_BASE_URL}#/video_page?id={course_id}&user_course_id={user_course_id}&name=%E5%AD%A6%E4%B9%A0%E4%B8%AD%E5%BF%83"
                             self.logger.info(f"生成备用URL: {backup_url}")
                             return backup_url
 
@@ -458,11 +653,11 @@ class CourseParser:
             return ""
 
         except Exception as e:
-            self.logger.error(f"获取选修课真实URL失败: {str(e)}")
+            self.logger.error(f"获取选修课 '{course_name}' 真实URL失败: {str(e)}")
             return ""
     
     def _extract_course_info(self, element, course_type: str) -> Dict:
-        """从课程元素中提取课程信息"""
+        """从课程元素句柄中提取课程信息"""
         try:
             course_info = {
                 'course_name': '',
@@ -472,92 +667,43 @@ class CourseParser:
                 'user_course_id': ''
             }
             
-            # 提取课程名称
-            name_selectors = [
-                '.course-title',
-                '.course-name', 
-                'h3',
-                'h4',
-                '[class*="title"]',
-                '[class*="name"]'
-            ]
-            
-            for selector in name_selectors:
-                try:
-                    name_element = element.locator(selector).first
-                    if name_element.count() > 0:
-                        course_info['course_name'] = name_element.inner_text().strip()
-                        break
-                except:
-                    continue
+            # 提取课程名称；合并选择器未命中时只返回空字符串，不会抛出异常
+            course_info['course_name'] = self._text(element, self._NAME_SELECTOR)
             
             # 如果没有找到标题，尝试获取链接文本或整个元素的文本
             if not course_info['course_name']:
-                try:
-                    # 尝试获取链接文本
-                    link_element = element.locator('a').first
-                    if link_element.count() > 0:
-                        course_info['course_name'] = link_element.inner_text().strip()
-                    else:
-                        # 使用整个元素的文本
-                        full_text = element.inner_text().strip()
-                        # 取前50个字符作为课程名
-                        course_info['course_name'] = full_text[:50] if full_text else ''
-                except:
-                    pass
+                # 尝试获取链接文本
+                course_info['course_name'] = self._text(element, 'a')
+                if not course_info['course_name']:
+                    # 使用整个元素的文本
+                    full_text = element.inner_text().strip()
+                    # 取前50个字符作为课程名
+                    course_info['course_name'] = full_text[:50] if full_text else ''
             
             # 提取学习进度
-            progress_selectors = [
-                '[class*="progress"]',
-                '[class*="percent"]',
-                'text=/\\d+%/',
-                'span:has-text("%")'
-            ]
-            
-            for selector in progress_selectors:
-                try:
-                    progress_element = element.locator(selector).first
-                    if progress_element.count() > 0:
-                        progress_text = progress_element.inner_text()
-                        # 提取百分比数字
-                        progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
-                        if progress_match:
-                            course_info['progress'] = float(progress_match.group(1))
-                            break
-                except:
-                    continue
-            
-            # 提取视频链接和user_course_id
-            link_selectors = [
-                'a[href*="video_page"]',
-                'a[href*="study"]',
-                'a[href*="course"]',
-                'a'
-            ]
-            
-            for selector in link_selectors:
-                try:
-                    link_element = element.locator(selector).first
-                    if link_element.count() > 0:
-                        href = link_element.get_attribute('href')
-                        if href:
-                            # 处理相对URL
-                            if href.startswith('#/'):
-                                href = Config.BASE_URL.rstrip('#/') + href
-                            elif href.startswith('/'):
-                                base_url = '/'.join(Config.BASE_URL.split('/')[:3])
-                                href = base_url + href
-                            
-                            course_info['video_url'] = href
-                            
-                            # 从URL中提取user_course_id
-                            parsed_url = urlparse(href)
-                            query_params = parse_qs(parsed_url.query)
-                            if 'user_course_id' in query_params:
-                                course_info['user_course_id'] = query_params['user_course_id'][0]
-                            break
-                except:
-                    continue
+            for progress_text in element.eval_on_selector_all(self._PROGRESS_SELECTOR, self._INNER_TEXTS_JS):
+                # 提取百分比数字
+                progress_match = _PROGRESS_RE.search(progress_text)
+                if progress_match:
+                    course_info['progress'] = float(progress_match.group(1))
+                    break
+            
+            # 提取视频链接和user_course_id，按关键字优先级在一次查询的结果中挑选
+            hrefs = [h for h in element.eval_on_selector_all('a[href]', self._HREFS_JS) if h]
+            href = next((h for keyword in self._LINK_KEYWORDS for h in hrefs if keyword in h),
+                        hrefs[0] if hrefs else None)
+            if href:
+                # 处理相对URL
+                if href.startswith('#/'):
+                    href = _BASE_URL + href
+                elif href.startswith('/'):
+                    href = _SITE_ORIGIN + href
+                
+                course_info['video_url'] = href
+                
+                # 从URL中提取user_course_id
+                ucid_match = _UCID_RE.search(href)
+                course_info['user_course_id'] = unquote(ucid_match.group(1)) if ucid_match else ''
             
             # 验证课程信息的有效性
             if course_info['course_name'] and len(course_info['course_name']) > 3:
@@ -575,18 +721,18 @@ class CourseParser:
         
         try:
             # 获取页面中所有的链接
-            links = self.page.locator('a').all()
+            links = self.page.locator('a').evaluate_all(self._LINK_ATTRS_JS)
             
             for link in links:
                 try:
-                    href = link.get_attribute('href')
-                    text = link.inner_text().strip()
+                    href = link['href']
+                    text = link['text']
                     
                     # 过滤掉明显不是课程的链接
                     if not href or not text or len(text) < 3:
                         continue
                         
-                    if any(keyword in text.lower() for keyword in ['登录', '首页', '退出', '帮助']):
+                    if _NAV_TEXT_RE.search(text):
                         continue
                     
                     # 检查是否是视频页面链接
@@ -597,20 +743,20 @@ class CourseParser:
                             'progress': 0.0,
                             'video_url': href,
                             'user_course_id': '',
-                            'id': hashlib.md5(f"{course_type}_{text}".encode('utf-8')).hexdigest()[:8]  # 添加缺失的 id 字段
+                            'id': _short_hash(f"{course_type}_{text}")  # 添加缺失的 id 字段
                         }
                         
                         # 处理相对URL
                         if href.startswith('#/'):
-                            course_info['video_url'] = Config.BASE_URL.rstrip('#/') + href
+                            course_info['video_url'] = _BASE_URL + href
                         
                         # 提取user_course_id
-                        parsed_url = urlparse(href)
-                        query_params = parse_qs(parsed_url.query)
-                        if 'user_course_id' in query_params:
-                            course_info['user_course_id'] = query_params['user_course_id'][0]
+                        ucid_match = _UCID_RE.search(href)
+                        if ucid_match:
+                            user_course_id = unquote(ucid_match.group(1))
+                            course_info['user_course_id'] = user_course_id
                             # 如果有真实的 user_course_id，则用它作为 id
-                            course_info['id'] = query_params['user_course_id'][0]
+                            course_info['id'] = user_course_id
                         
                         courses.append(course_info)
                         
@@ -625,24 +771,13 @@ class CourseParser:
     def save_courses_to_database(self, courses_data: Dict[str, List[Dict]]) -> bool:
         """将课程信息保存到数据库"""
         try:
-            saved_count = 0
-            
-            for course_type, courses in courses_data.items():
-                for course in courses:
-                    try:
-                        course_id = db.add_or_update_course(
-                            course_name=course['course_name'],
-                            course_type=course_type,
-                            video_url=course.get('video_url', ''),
-                            user_course_id=course.get('user_course_id', ''),
-                            progress=course.get('progress', 0.0)
-                        )
-                        saved_count += 1
-                        self.logger.debug(f"保存课程: {course['course_name']} (ID: {course_id})")
-                        
-                    except Exception as e:
-                        self.logger.warning(f"保存课程失败 {course['course_name']}: {str(e)}")
-                        continue
+            rows = [
+                (course['course_name'], course_type, course.get('video_url', ''),
+                 course.get('user_course_id', ''), course.get('progress', 0.0))
+                for course_type, courses in courses_data.items()
+                for course in courses
+            ]
+            saved_count = db.bulk_upsert_courses(rows)
             
             self.logger.info(f"成功保存 {saved_count} 门课程到数据库")
             return True
@@ -654,39 +789,27 @@ class CourseParser:
     def update_course_progress_from_page(self, course_id: int, video_url: str) -> float:
         """从视频页面更新课程进度"""
         try:
+            self._elective_row_handles.clear()
             self.page.goto(video_url)
             self.page.wait_for_load_state('networkidle')
             
-            # 查找进度指示器
-            progress_selectors = [
-                '[class*="progress"]',
-                '[class*="percent"]', 
-                'text=/\\d+%/',
-                'span:has-text("%")',
-                '.video-progress',
-                '#progress'
-            ]
-            
-            for selector in progress_selectors:
-                try:
-                    progress_element = self.page.locator(selector).first
-                    if progress_element.count() > 0:
-                        progress_text = progress_element.inner_text()
-                        progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
-                        if progress_match:
-                            progress = float(progress_match.group(1))
-                            db.update_course_progress(course_id, progress)
-                            return progress
-                except:
-                    continue
+            # 查找进度指示器；只有读取页面时的Playwright错误被忽略，数据库错误交给外层记录
+            try:
+                progress_texts = self.page.locator(self._PAGE_PROGRESS_SELECTOR).all_inner_texts()
+            except PlaywrightError as e:
+                self.logger.debug("读取页面进度指示器失败: %s", e)
+                progress_texts = []
+            
+            for progress_text in progress_texts:
+                progress_match = _PROGRESS_RE.search(progress_text)
+                if progress_match:
+                    progress = float(progress_match.group(1))
+                    db.update_course_progress(course_id, progress)
+                    self.invalidate_cache()
+                    return progress
             
             # 如果没有找到进度指示器，返回当前数据库中的进度
-            courses = db.get_all_courses()
-            for course in courses:
-                if course['id'] == course_id:
-                    return course['progress']
-                    
-            return 0.0
+            return db.get_course_progress(course_id) or 0.0
             
         except Exception as e:
             self.logger.error(f"更新课程进度失败: {str(e)}")
@@ -1,25 +1,82 @@
+import atexit
+import collections
+import logging
 import sqlite3
 import os
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Iterable, Tuple
 from config.config import Config
 
+# RETURNING 子句需要 SQLite 3.35+，旧版本在 UPSERT 之后再查询一次课程ID
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# 按 (课程名称, 类型) 插入课程，已存在时只更新链接信息（依赖 idx_courses_name_type 唯一索引）
+_UPSERT_COURSE_SQL = '''
+    INSERT INTO courses (course_name, course_type, video_url, 
+                       user_course_id, progress)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (course_name, course_type) DO UPDATE
+    SET video_url = excluded.video_url, user_course_id = excluded.user_course_id, 
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+# 高频语句使用固定的SQL文本，配合共享连接命中 sqlite3 模块的预编译语句缓存
+_UPDATE_PROGRESS_SQL = '''
+    UPDATE courses 
+    SET progress = ?, is_completed = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+_SELECT_PROGRESS_SQL = 'SELECT progress FROM courses WHERE id = ?'
+_INSERT_LOG_SQL = '''
+    INSERT INTO learning_logs 
+    (course_id, duration_minutes, progress_before, progress_after, status, notes)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
 class DatabaseManager:
+    # 学习记录缓冲条数，达到后批量写入数据库
+    LOG_FLUSH_SIZE = 20
+    
     def __init__(self):
         self.db_path = Config.DATABASE_PATH
+        self.logger = logging.getLogger(__name__)
         self._ensure_db_directory()
+        # 整个进程共用一个长连接，保留SQLite的页缓存，避免每次调用都重新打开数据库文件
+        # 学习调度等后台线程也会访问数据库，因此允许跨线程使用并用可重入锁串行化
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        # 待写入的学习记录，由 add_learning_log 追加，批量刷新
+        self._log_buffer = collections.deque()
+        # 课程表数据版本号，每次修改课程时递增；get_all_courses 按版本缓存结果
+        self._courses_version = 0
+        self._all_courses_cache = None
+        atexit.register(self.close)
         self._init_database()
     
+    def close(self):
+        """写入缓冲的学习记录并关闭数据库连接"""
+        with self._lock:
+            self.flush_learning_logs()
+            self._conn.close()
+    
     def _ensure_db_directory(self):
         """确保数据库目录存在"""
-        db_dir = os.path.dirname(self.db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
     
     def _init_database(self):
         """初始化数据库表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
+            # WAL模式下读写互不阻塞，NORMAL同步级别只在检查点时fsync，适合频繁的小事务写入
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.execute('PRAGMA cache_size=-64000')
+            cursor.execute('PRAGMA mmap_size=268435456')
+            cursor.execute('PRAGMA busy_timeout=5000')
+            
             # 创建课程表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS courses (
@@ -51,44 +108,115 @@ class DatabaseManager:
                 )
             ''')
             
+            # 课程按 (名称, 类型) 唯一；旧数据库中若有重复记录，先合并再建索引
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_courses_name_type'"
+            )
+            if not cursor.fetchone():
+                self._merge_duplicate_courses(cursor)
+                cursor.execute(
+                    'CREATE UNIQUE INDEX idx_courses_name_type ON courses (course_name, course_type)'
+                )
+            
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_learning_logs_course ON learning_logs (course_id)'
+            )
+            
+            # 未完成课程的部分索引，同时满足 get_incomplete_courses 的过滤和排序
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_courses_incomplete ON courses (course_type, course_name)
+                WHERE is_completed = 0 AND progress < 100.0
+            ''')
+            
             conn.commit()
     
+    def _merge_duplicate_courses(self, cursor):
+        """
+        合并 (课程名称, 类型) 重复的课程记录
+        
+        每组保留ID最小的一条：进度和完成状态取组内最大值，创建/更新时间取最早/最晚，
+        链接信息取最近更新的一条；学习记录改挂到保留的课程上，再删除多余的记录
+        """
+        cursor.execute('''
+            SELECT c.id, g.keep_id
+            FROM courses c
+            JOIN (
+                SELECT course_name, course_type, MIN(id) AS keep_id
+                FROM courses
+                GROUP BY course_name, course_type
+                HAVING COUNT(*) > 1
+            ) g ON c.course_name = g.course_name AND c.course_type = g.course_type
+            WHERE c.id != g.keep_id
+        ''')
+        merge_rows = cursor.fetchall()
+        if not merge_rows:
+            return
+        
+        keep_ids = {(keep_id,) for _, keep_id in merge_rows}
+        cursor.executemany('''
+            UPDATE courses
+            SET progress = (SELECT MAX(d.progress) FROM courses d
+                            WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type),
+                is_completed = (SELECT MAX(d.is_completed) FROM courses d
+                                WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type),
+                created_at = (SELECT MIN(d.created_at) FROM courses d
+                              WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type),
+                updated_at = (SELECT MAX(d.updated_at) FROM courses d
+                              WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type),
+                video_url = (SELECT d.video_url FROM courses d
+                             WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type
+                             ORDER BY d.updated_at DESC, d.id DESC LIMIT 1),
+                user_course_id = (SELECT d.user_course_id FROM courses d
+                                  WHERE d.course_name = courses.course_name AND d.course_type = courses.course_type
+                                  ORDER BY d.updated_at DESC, d.id DESC LIMIT 1)
+            WHERE id = ?
+        ''', keep_ids)
+        cursor.executemany('UPDATE learning_logs SET course_id = ? WHERE course_id = ?',
+                           [(keep_id, old_id) for old_id, keep_id in merge_rows])
+        cursor.executemany('DELETE FROM courses WHERE id = ?', [(old_id,) for old_id, _ in merge_rows])
+        
+        self.logger.warning(f"合并了 {len(merge_rows)} 条重复课程记录（涉及 {len(keep_ids)} 门课程）")
+    
     def add_or_update_course(self, course_name: str, course_type: str, 
                            video_url: str = None, user_course_id: str = None, 
                            progress: float = 0.0) -> int:
         """添加或更新课程信息"""
-        with sqlite3.connect(self.db_path) as conn:
+        params = (course_name, course_type, video_url, user_course_id, progress)
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
-            # 检查课程是否已存在
-            cursor.execute(
-                'SELECT id, progress FROM courses WHERE course_name = ? AND course_type = ?',
-                (course_name, course_type)
-            )
-            existing = cursor.fetchone()
-            
-            if existing:
-                # 更新现有课程
-                cursor.execute('''
-                    UPDATE courses 
-                    SET video_url = ?, user_course_id = ?, 
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (video_url, user_course_id, existing[0]))
-                return existing[0]
+            self._courses_version += 1
+            if _SQLITE_HAS_RETURNING:
+                cursor.execute(_UPSERT_COURSE_SQL + ' RETURNING id', params)
             else:
-                # 添加新课程
-                cursor.execute('''
-                    INSERT INTO courses (course_name, course_type, video_url, 
-                                       user_course_id, progress)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (course_name, course_type, video_url, user_course_id, progress))
-                return cursor.lastrowid
+                cursor.execute(_UPSERT_COURSE_SQL, params)
+                cursor.execute(
+                    'SELECT id FROM courses WHERE course_name = ? AND course_type = ?',
+                    (course_name, course_type)
+                )
+            return cursor.fetchone()[0]
+    
+    def bulk_upsert_courses(self, rows: Iterable[Tuple]) -> int:
+        """在单个事务中批量添加或更新课程
+        
+        Args:
+            rows: (course_name, course_type, video_url, user_course_id, progress) 元组序列
+            
+        Returns:
+            处理的课程数量
+        """
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            
+            self._courses_version += 1
+            # 同一批次中重复的课程只更新链接信息，与逐条调用的行为一致
+            cursor.executemany(_UPSERT_COURSE_SQL, rows)
+            
+            return cursor.rowcount
     
     def get_incomplete_courses(self) -> List[Dict]:
         """获取未完成的课程列表"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -101,72 +229,80 @@ class DatabaseManager:
     
     def update_course_progress(self, course_id: int, progress: float):
         """更新课程学习进度"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            is_completed = 1 if progress >= 100.0 else 0
-            
-            cursor.execute('''
-                UPDATE courses 
-                SET progress = ?, is_completed = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (progress, is_completed, course_id))
-            
-            conn.commit()
+        is_completed = 1 if progress >= 100.0 else 0
+        with self._lock, self._conn as conn:
+            self._courses_version += 1
+            conn.execute(_UPDATE_PROGRESS_SQL, (progress, is_completed, course_id))
+    
+    def get_course_progress(self, course_id: int) -> Optional[float]:
+        """获取单门课程的学习进度，课程不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute(_SELECT_PROGRESS_SQL, (course_id,)).fetchone()
+            return row[0] if row else None
     
     def add_learning_log(self, course_id: int, duration_minutes: float = None,
                         progress_before: float = None, progress_after: float = None,
                         status: str = 'completed', notes: str = None):
-        """添加学习记录"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO learning_logs 
-                (course_id, duration_minutes, progress_before, progress_after, status, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (course_id, duration_minutes, progress_before, progress_after, status, notes))
+        """添加学习记录（先进入缓冲区，满 LOG_FLUSH_SIZE 条或退出时批量写入）"""
+        with self._lock:
+            self._log_buffer.append((course_id, duration_minutes, progress_before,
+                                     progress_after, status, notes))
+            if len(self._log_buffer) >= self.LOG_FLUSH_SIZE:
+                self.flush_learning_logs()
+    
+    def add_learning_logs_bulk(self, rows: Iterable[Tuple]) -> int:
+        """在单个事务中批量添加学习记录
+        
+        Args:
+            rows: (course_id, duration_minutes, progress_before, progress_after, status, notes) 元组序列
             
-            conn.commit()
+        Returns:
+            写入的记录数量
+        """
+        with self._lock, self._conn as conn:
+            return conn.executemany(_INSERT_LOG_SQL, rows).rowcount
+    
+    def flush_learning_logs(self) -> int:
+        """将缓冲区中的学习记录写入数据库"""
+        with self._lock:
+            if not self._log_buffer:
+                return 0
+            rows = list(self._log_buffer)
+            self._log_buffer.clear()
+            return self.add_learning_logs_bulk(rows)
     
     def get_all_courses(self) -> List[Dict]:
-        """获取所有课程"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM courses 
-                ORDER BY course_type, is_completed, course_name
-            ''')
+        """获取所有课程（课程表未修改时直接返回缓存结果的副本）"""
+        with self._lock, self._conn as conn:
+            cached = self._all_courses_cache
+            if cached is None or cached[0] != self._courses_version:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT * FROM courses 
+                    ORDER BY course_type, is_completed, course_name
+                ''')
+                
+                cached = (self._courses_version, [dict(row) for row in cursor.fetchall()])
+                self._all_courses_cache = cached
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(course) for course in cached[1]]
     
     def get_learning_statistics(self) -> Dict:
-        """获取学习统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # 总课程数
-            cursor.execute('SELECT COUNT(*) FROM courses')
-            total_courses = cursor.fetchone()[0]
-            
-            # 已完成课程数
-            cursor.execute('SELECT COUNT(*) FROM courses WHERE is_completed = 1')
-            completed_courses = cursor.fetchone()[0]
-            
-            # 平均进度
-            cursor.execute('SELECT AVG(progress) FROM courses')
-            avg_progress = cursor.fetchone()[0] or 0
-            
+        """获取学习统计信息（一次分组扫描，总计由各类型汇总得出）"""
+        with self._lock, self._conn as conn:
             # 必修课和选修课统计
-            cursor.execute('''
+            type_stats = conn.execute('''
                 SELECT course_type, COUNT(*) as count, AVG(progress) as avg_progress,
-                       SUM(is_completed) as completed_count
+                       SUM(is_completed) as completed_count, SUM(progress) as total_progress
                 FROM courses 
                 GROUP BY course_type
-            ''')
-            type_stats = cursor.fetchall()
+            ''').fetchall()
+            
+            # 总课程数、已完成课程数及平均进度
+            total_courses = sum(row[1] for row in type_stats)
+            completed_courses = sum(row[3] for row in type_stats)
+            avg_progress = (sum(row[4] for row in type_stats) / total_courses) if total_courses > 0 else 0
             
             return {
                 'total_courses': total_courses,
@@ -185,21 +321,21 @@ class DatabaseManager:
     def clear_all_data(self) -> bool:
         """清空所有数据库数据"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
-                # 获取清空前的统计信息
-                stats_before = self.get_learning_statistics()
+                # 在一个立即写事务中完成清空；不带WHERE的DELETE可走SQLite的截断优化，不逐行记录日志
+                if not conn.in_transaction:
+                    cursor.execute('BEGIN IMMEDIATE')
                 
-                # 清空所有表数据
+                # 清空所有表数据（包括尚未写入的缓冲记录）
+                self._courses_version += 1
+                self._log_buffer.clear()
                 cursor.execute('DELETE FROM learning_logs')
                 cursor.execute('DELETE FROM courses')
                 
                 # 重置自增ID
-                cursor.execute('DELETE FROM sqlite_sequence WHERE name="learning_logs"')
-                cursor.execute('DELETE FROM sqlite_sequence WHERE name="courses"')
-                
-                conn.commit()
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('learning_logs', 'courses')")
                 
                 return True
                 
@@ -210,18 +346,17 @@ class DatabaseManager:
     def get_database_info(self) -> Dict:
         """获取数据库基本信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 获取各表的记录数量
-                cursor.execute('SELECT COUNT(*) FROM courses')
-                courses_count = cursor.fetchone()[0]
-                
-                cursor.execute('SELECT COUNT(*) FROM learning_logs')
-                logs_count = cursor.fetchone()[0]
+            self.flush_learning_logs()
+            with self._lock, self._conn as conn:
+                # 获取各表的记录数量（调用方需要精确值，sqlite_sequence 在清空或冲突插入后并不等于行数）
+                # 一条语句完成两次计数，SQLite 会选用表上最小的索引进行计数
+                courses_count, logs_count = conn.execute(
+                    'SELECT (SELECT COUNT(*) FROM courses), (SELECT COUNT(*) FROM learning_logs)'
+                ).fetchone()
                 
-                # 获取数据库文件大小
-                db_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+                # 获取数据库文件大小（WAL模式下尚未检查点的数据在 -wal 文件中，一并计入）
+                db_size = sum(os.path.getsize(path) for path in (self.db_path, self.db_path + '-wal')
+                              if os.path.exists(path))
                 
                 return {
                     'database_path': self.db_path,
@@ -238,5 +373,21 @@ class DatabaseManager:
                 'error': str(e)
             }
 
+class _LazyDatabaseManager:
+    """全局数据库实例的代理，首次访问属性时才创建 DatabaseManager（建目录、打开连接）"""
+    
+    def __init__(self):
+        self._instance = None
+        self._init_lock = threading.Lock()
+    
+    def __getattr__(self, name):
+        instance = self._instance
+        if instance is None:
+            with self._init_lock:
+                if self._instance is None:
+                    self._instance = DatabaseManager()
+                instance = self._instance
+        return getattr(instance, name)
+
 # 全局数据库实例
-db = DatabaseManager()
\ No newline at end of file
+db = _LazyDatabaseManager()
\ No newline at end of file
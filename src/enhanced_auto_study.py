@@ -8,6 +8,7 @@ import logging
 import time
 import random
 import sys
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional
 from playwright.sync_api import Page
@@ -21,9 +22,105 @@ sys.path.insert(0, str(project_root))
 
 from enhanced_video_monitor import EnhancedVideoMonitor
 
+# 增强版"继续学习"按钮处理器是可选模块，只在导入时解析一次
+try:
+    from enhanced_continue_button_handler import EnhancedContinueButtonHandler
+except ImportError:
+    EnhancedContinueButtonHandler = None
+
 class EnhancedAutoStudy:
     """增强版自动学习类，集成重构播放器"""
     
+    # 监控学习进度时的汇报间隔（秒）
+    PROGRESS_REPORT_INTERVAL = 30
+    
+    # "继续学习"按钮选择器，优先使用更精确的选择器
+    _CONTINUE_SELECTORS = (
+        'div.user_choise',  # 精确匹配class为user_choise的div
+        'div.user_choise:has-text("继续学习")',  # 更精确的组合选择器
+        'div.user_choise:has-text("开始学习")',
+        '[class*="user_choise"]',
+        'div:text("继续学习")',  # 文本精确匹配
+        'div:text("开始学习")',
+        'button:has-text("继续学习")',
+        'button:has-text("开始学习")',
+    )
+    
+    # "继续学习"按钮处理策略：(描述, 处理方法名, 点击前等待秒数, 是否先刷新页面)
+    _CONTINUE_STRATEGIES = (
+        ('增强版处理器', '_click_continue_learning_button', 0, False),
+        ('额外等待后重试', '_click_continue_learning_button', 3, False),
+        ('刷新页面后重试', '_click_continue_learning_button', 5, True),
+        ('多次尝试点击（第1次）', '_click_continue_learning_button', 2, False),
+        ('多次尝试点击（第2次）', '_click_continue_learning_button', 2, False),
+        ('多次尝试点击（第3次）', '_click_continue_learning_button', 2, False),
+        ('JavaScript强制查找', '_click_continue_via_javascript', 0, False),
+        ('使用备用处理器', '_click_continue_learning_button_fallback', 0, False),
+    )
+    
+    # 在主页面和iframe中强制查找并点击"继续学习"按钮的脚本
+    _FORCE_CONTINUE_JS = """() => {
+        // 查找策略1: 主页面查找
+        let buttons = document.querySelectorAll('div.user_choise');
+        for (let btn of buttons) {
+            if (btn.textContent && btn.textContent.includes('继续学习')) {
+                btn.click();
+                return { success: true, method: 'main_page_user_choise' };
+            }
+        }
+
+        // 查找策略2: 文本匹配
+        let allDivs = document.querySelectorAll('div');
+        for (let div of allDivs) {
+            let text = div.textContent || '';
+            if (text.includes('继续学习') && div.offsetParent !== null) {
+                div.click();
+                return { success: true, method: 'text_matching' };
+            }
+        }
+
+        // 查找策略3: iframe中查找
+        let iframes = document.querySelectorAll('iframe');
+        for (let iframe of iframes) {
+            try {
+                let iframeDoc = iframe.contentDocument || iframe.contentWindow.document;
+                if (iframeDoc) {
+                    let iframeButtons = iframeDoc.querySelectorAll('div.user_choise');
+                    for (let btn of iframeButtons) {
+                        if (btn.textContent && btn.textContent.includes('继续学习')) {
+                            btn.click();
+                            return { success: true, method: 'iframe_user_choise' };
+                        }
+                    }
+                }
+            } catch (e) {
+                continue;
+            }
+        }
+
+        return { success: false };
+    }"""
+    
+    # 视频播放器的常见选择器
+    _VIDEO_SELECTORS = (
+        'video',
+        'iframe[src*="video"]',
+        '[class*="video-player"]',
+        '[class*="player"]',
+        '[id*="video"]',
+        '[id*="player"]'
+    )
+    
+    # 播放按钮选择器
+    _PLAY_SELECTORS = (
+        'button:has-text("播放")',
+        '[class*="play"]:visible',
+        '[id*="play"]:visible',
+        'button[title*="play" i]',
+        'button[aria-label*="play" i]',
+        '.play-btn:visible'
+    )
+    
     def __init__(self, page: Page):
         self.page = page
         self.logger = logging.getLogger(__name__)
@@ -31,6 +128,10 @@ class EnhancedAutoStudy:
         self.study_session_start: Optional[float] = None
         self.is_studying = False
         self.is_paused = False
+        # 停止学习时置位，用于立即唤醒正在等待下一个进度汇报点的监控循环
+        self._stop_event = threading.Event()
+        # 每个页面复用同一个增强版按钮处理器，首次点击时创建
+        self._continue_handler = None
         
         # 根据配置决定是否使用重构播放器
         self.use_refactored_player = PlayerConfig.USE_REFACTORED_PLAYER
@@ -58,6 +159,7 @@ class EnhancedAutoStudy:
                 return False
             
             self.is_studying = True
+            self._stop_event.clear()
             self.logger.info(f"🚀 开始增强版自动学习，共 {len(courses)} 门课程")
             
             # 学习统计
@@ -121,6 +223,8 @@ class EnhancedAutoStudy:
             
         finally:
             self.is_studying = False
+            # 学习记录在 db 中缓冲批量写入，本轮学习结束时统一落库
+            db.flush_learning_logs()
             if self.refactored_player:
                 self.refactored_player.cleanup()
     
@@ -213,25 +317,18 @@ class EnhancedAutoStudy:
     
     def _click_continue_learning_button(self) -> bool:
         """查找并点击'继续学习'或'开始学习'元素（使用增强版处理器）"""
-        try:
-            # 导入增强版处理器
-            import sys
-            from pathlib import Path
-            project_root = Path(__file__).parent.parent
-            sys.path.insert(0, str(project_root))
-            
-            from enhanced_continue_button_handler import EnhancedContinueButtonHandler
-            
-            # 创建增强版处理器实例
-            handler = EnhancedContinueButtonHandler(self.page)
-            
-            # 使用增强版逻辑处理
-            return handler.click_continue_learning_button()
-            
-        except ImportError:
+        if EnhancedContinueButtonHandler is None:
             # 如果无法导入增强版处理器，回退到原始逻辑
             self.logger.warning("无法导入增强版处理器，使用原始逻辑")
             return self._click_continue_learning_button_fallback()
+        
+        try:
+            # 创建（或复用）增强版处理器实例
+            if self._continue_handler is None:
+                self._continue_handler = EnhancedContinueButtonHandler(self.page)
+            
+            # 使用增强版逻辑处理
+            return self._continue_handler.click_continue_learning_button()
             
         except Exception as e:
             self.logger.error(f"增强版处理器失败: {str(e)}")
@@ -241,141 +338,47 @@ class EnhancedAutoStudy:
     def _enhanced_continue_button_handling(self) -> bool:
         """
         增强版"继续学习"按钮处理逻辑
-        包含多重检测策略和重试机制，确保按钮能被正确识别和点击
+        按 _CONTINUE_STRATEGIES 依次尝试多重检测策略和重试，任一策略成功即返回
         """
         self.logger.info("🎯 启动增强版'继续学习'按钮处理逻辑")
         
-        # 策略1: 使用已集成的增强版处理器
-        try:
-            if self._click_continue_learning_button():
-                self.logger.info("✅ 策略1成功: 增强版处理器点击成功")
-                return True
-        except Exception as e:
-            self.logger.debug(f"策略1失败: {e}")
-        
-        # 策略2: 额外等待时间后重试
-        try:
-            self.logger.info("🔄 策略2: 额外等待后重试")
-            time.sleep(3)  # 额外等待3秒
-            
-            if self._click_continue_learning_button():
-                self.logger.info("✅ 策略2成功: 等待后点击成功")
-                return True
-        except Exception as e:
-            self.logger.debug(f"策略2失败: {e}")
-        
-        # 策略3: 强制刷新页面后重试
-        try:
-            self.logger.info("🔄 策略3: 刷新页面后重试")
-            self.page.reload()
-            self.page.wait_for_load_state('networkidle')
-            time.sleep(5)  # 等待页面完全加载
-            
-            if self._click_continue_learning_button():
-                self.logger.info("✅ 策略3成功: 刷新后点击成功")
-                return True
-        except Exception as e:
-            self.logger.debug(f"策略3失败: {e}")
-        
-        # 策略4: 多次尝试点击
-        try:
-            self.logger.info("🔄 策略4: 多次尝试点击")
-            for attempt in range(3):
-                self.logger.debug(f"   尝试第 {attempt + 1} 次...")
-                time.sleep(2)
+        for index, (description, method_name, delay, reload) in enumerate(self._CONTINUE_STRATEGIES, 1):
+            try:
+                if index > 1:
+                    self.logger.info(f"🔄 策略{index}: {description}")
                 
-                if self._click_continue_learning_button():
-                    self.logger.info(f"✅ 策略4成功: 第 {attempt + 1} 次尝试点击成功")
-                    return True
-        except Exception as e:
-            self.logger.debug(f"策略4失败: {e}")
-        
-        # 策略5: 使用JavaScript强制查找和点击
-        try:
-            self.logger.info("🔄 策略5: JavaScript强制查找")
-            success = self.page.evaluate("""
-                () => {
-                    // 查找策略1: 主页面查找
-                    let buttons = document.querySelectorAll('div.user_choise');
-                    for (let btn of buttons) {
-                        if (btn.textContent && btn.textContent.includes('继续学习')) {
-                            btn.click();
-                            return { success: true, method: 'main_page_user_choise' };
-                        }
-                    }
-                    
-                    // 查找策略2: 文本匹配
-                    let allDivs = document.querySelectorAll('div');
-                    for (let div of allDivs) {
-                        let text = div.textContent || '';
-                        if (text.includes('继续学习') && div.offsetParent !== null) {
-                            div.click();
-                            return { success: true, method: 'text_matching' };
-                        }
-                    }
-                    
-                    // 查找策略3: iframe中查找
-                    let iframes = document.querySelectorAll('iframe');
-                    for (let iframe of iframes) {
-                        try {
-                            let iframeDoc = iframe.contentDocument || iframe.contentWindow.document;
-                            if (iframeDoc) {
-                                let iframeButtons = iframeDoc.querySelectorAll('div.user_choise');
-                                for (let btn of iframeButtons) {
-                                    if (btn.textContent && btn.textContent.includes('继续学习')) {
-                                        btn.click();
-                                        return { success: true, method: 'iframe_user_choise' };
-                                    }
-                                }
-                            }
-                        } catch (e) {
-                            continue;
-                        }
-                    }
-                    
-                    return { success: false };
-                }
-            """)
-            
-            if success['success']:
-                self.logger.info(f"✅ 策略5成功: JavaScript {success['method']} 点击成功")
-                time.sleep(2)  # 等待点击生效
-                return True
+                if reload:
+                    self.page.reload()
+                    self.page.wait_for_load_state('networkidle')
+                if delay:
+                    time.sleep(delay)
                 
-        except Exception as e:
-            self.logger.debug(f"策略5失败: {e}")
-        
-        # 策略6: 使用备用处理器
-        try:
-            self.logger.info("🔄 策略6: 使用备用处理器")
-            if self._click_continue_learning_button_fallback():
-                self.logger.info("✅ 策略6成功: 备用处理器点击成功")
-                return True
-        except Exception as e:
-            self.logger.debug(f"策略6失败: {e}")
+                if getattr(self, method_name)():
+                    self.logger.info(f"✅ 策略{index}成功: {description}")
+                    return True
+            except Exception as e:
+                self.logger.debug(f"策略{index}失败: {e}")
         
         self.logger.error("❌ 所有增强版按钮处理策略都失败")
         return False
     
+    def _click_continue_via_javascript(self) -> bool:
+        """使用JavaScript在主页面和iframe中强制查找并点击"继续学习"按钮"""
+        result = self.page.evaluate(self._FORCE_CONTINUE_JS)
+        
+        if result['success']:
+            self.logger.info(f"JavaScript {result['method']} 点击成功")
+            time.sleep(2)  # 等待点击生效
+            return True
+        return False
+    
     def _click_continue_learning_button_fallback(self) -> bool:
         """原始的继续学习按钮点击逻辑（回退方案）"""
         try:
             self.logger.info("🔍 查找'继续学习'元素（回退逻辑）...")
             
-            # 定义选择器，优先使用更精确的选择器
-            continue_selectors = [
-                'div.user_choise',  # 精确匹配class为user_choise的div
-                'div.user_choise:has-text("继续学习")',  # 更精确的组合选择器
-                'div.user_choise:has-text("开始学习")',
-                '[class*="user_choise"]',
-                'div:text("继续学习")',  # 文本精确匹配
-                'div:text("开始学习")',
-                'button:has-text("继续学习")',
-                'button:has-text("开始学习")',
-            ]
-            
             # 先在主页面查找
-            for selector in continue_selectors:
+            for selector in self._CONTINUE_SELECTORS:
                 try:
                     elements = self.page.locator(selector).all()
                     if elements:
@@ -440,7 +443,7 @@ class EnhancedAutoStudy:
                         self.logger.debug(f"JavaScript点击失败: {js_error}")
                     
                     # 备用方案：使用Playwright的locator
-                    for selector in continue_selectors:
+                    for selector in self._CONTINUE_SELECTORS:
                         try:
                             elements = frame.locator(selector).all()
                             if elements:
@@ -526,31 +529,17 @@ class EnhancedAutoStudy:
             
             duration = PlayerConfig.LEARNING_DURATION_MINUTES
             total_seconds = duration * 60
-            progress_interval = 30
             
-            start_time = time.time()
             initial_progress = course_data.get('progress', 0)
-            current_progress = initial_progress
             
-            while time.time() - start_time < total_seconds:
-                if not self.is_studying:
-                    self.logger.info("学习已停止")
-                    break
-                
-                while self.is_paused:
-                    time.sleep(1)
-                
-                elapsed = time.time() - start_time
-                progress_increment = (elapsed / total_seconds) * (100 - initial_progress)
-                current_progress = min(100, initial_progress + progress_increment)
-                
-                if int(elapsed) % progress_interval == 0:
-                    self.logger.info(f"📊 学习进度: {current_progress:.1f}%")
-                
-                time.sleep(1)
+            def report(ratio: float):
+                current_progress = min(100, initial_progress + ratio * (100 - initial_progress))
+                self.logger.info(f"📊 学习进度: {current_progress:.1f}%")
+            
+            elapsed = self._wait_study_duration(total_seconds, report)
             
             final_progress = min(100, initial_progress + (100 - initial_progress))
-            duration_actual = (time.time() - start_time) / 60
+            duration_actual = elapsed / 60
             
             self.logger.info(f"🎉 传统监控视频学习完成")
             self.logger.info(f"   最终进度: {final_progress:.1f}%")
@@ -642,18 +631,9 @@ class EnhancedAutoStudy:
     def _play_original_video(self) -> bool:
         """原始播放器播放视频"""
         try:
-            # 查找视频播放器的常见选择器
-            video_selectors = [
-                'video',
-                'iframe[src*="video"]',
-                '[class*="video-player"]',
-                '[class*="player"]',
-                '[id*="video"]',
-                '[id*="player"]'
-            ]
-            
+            # 查找视频播放器
             video_element = None
-            for selector in video_selectors:
+            for selector in self._VIDEO_SELECTORS:
                 try:
                     elements = self.page.locator(selector).all()
                     if elements:
@@ -676,16 +656,7 @@ class EnhancedAutoStudy:
     def _find_and_click_play_button(self) -> bool:
         """查找并点击播放按钮"""
         try:
-            play_selectors = [
-                'button:has-text("播放")',
-                '[class*="play"]:visible',
-                '[id*="play"]:visible',
-                'button[title*="play" i]',
-                'button[aria-label*="play" i]',
-                '.play-btn:visible'
-            ]
-            
-            for selector in play_selectors:
+            for selector in self._PLAY_SELECTORS:
                 try:
                     elements = self.page.locator(selector).all()
                     if elements:
@@ -707,34 +678,53 @@ class EnhancedAutoStudy:
         """监控原始播放器学习进度"""
         try:
             study_duration = PlayerConfig.LEARNING_DURATION_MINUTES * 60  # 转为秒
-            start_time = time.time()
             
-            while time.time() - start_time < study_duration:
-                if not self.is_studying:
-                    break
-                
-                # 等待暂停恢复
-                while self.is_paused:
-                    time.sleep(1)
-                
-                # 模拟进度更新
-                elapsed = time.time() - start_time
-                progress = min(100, (elapsed / study_duration) * 100)
-                
-                # 每30秒记录一次进度
-                if int(elapsed) % 30 == 0:
-                    self.logger.info(f"学习进度: {progress:.1f}%")
-                
-                time.sleep(1)
+            # 模拟进度更新，每个汇报间隔记录一次进度
+            elapsed = self._wait_study_duration(
+                study_duration,
+                lambda ratio: self.logger.info(f"学习进度: {min(100, ratio * 100):.1f}%")
+            )
             
             # 返回最终进度
-            final_progress = min(100, ((time.time() - start_time) / study_duration) * 100)
+            final_progress = min(100, (elapsed / study_duration) * 100)
             return final_progress
             
         except Exception as e:
             self.logger.error(f"监控学习进度失败: {str(e)}")
             return 0
     
+    def _wait_study_duration(self, total_seconds: float, report) -> float:
+        """
+        等待学习时长结束，每隔 PROGRESS_REPORT_INTERVAL 秒以已学习比例调用一次 report
+        
+        直接休眠到下一个汇报点，停止学习时立即返回；暂停的时间不计入学习时长
+        
+        Returns:
+            float: 实际学习的秒数（不含暂停时间）
+        """
+        start_time = time.time()
+        paused_seconds = 0.0
+        elapsed = 0.0
+        
+        while elapsed < total_seconds:
+            if not self.is_studying:
+                self.logger.info("学习已停止")
+                break
+            
+            # 等待暂停恢复，并累计暂停时长
+            if self.is_paused:
+                pause_start = time.time()
+                while self.is_paused and self.is_studying:
+                    self._stop_event.wait(1)
+                paused_seconds += time.time() - pause_start
+                continue
+            
+            self._stop_event.wait(min(self.PROGRESS_REPORT_INTERVAL, total_seconds - elapsed))
+            elapsed = min(total_seconds, time.time() - start_time - paused_seconds)
+            report(elapsed / total_seconds)
+        
+        return elapsed
+    
     def get_study_status(self) -> Dict:
         """获取学习状态"""
         status = {
@@ -768,6 +758,7 @@ class EnhancedAutoStudy:
         """停止学习"""
         self.is_studying = False
         self.is_paused = False
+        self._stop_event.set()
         if self.refactored_player:
             self.refactored_player.stop_learning()
         self.logger.info("⏹️ 学习已停止")
@@ -9,6 +9,9 @@ from typing import List, Dict
 from config.config import Config
 from src.database import db
 
+# 页面进度文本中的百分比，如 "45.5%"
+_PROGRESS_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+
 class EnhancedCourseParser:
     """
     增强版课程解析器，支持不同类型课程的正确URL格式：
@@ -87,7 +90,7 @@ class EnhancedCourseParser:
                     progress_elements = parent_li.locator('.el-progress__text').all()
                     for progress_el in progress_elements:
                         progress_text = progress_el.inner_text().strip()
-                        progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
+                        progress_match = _PROGRESS_RE.search(progress_text)
                         if progress_match:
                             progress = float(progress_match.group(1))
                             break
@@ -308,7 +311,7 @@ class EnhancedCourseParser:
                     progress_cell = row.locator('td').nth(3)  # 第4列通常是进度
                     if progress_cell.count() > 0:
                         progress_text = progress_cell.inner_text().strip()
-                        progress_match = re.search(r'(\d+(?:\.\d+)?)%', progress_text)
+                        progress_match = _PROGRESS_RE.search(progress_text)
                         if progress_match:
                             progress = float(progress_match.group(1))
 
@@ -8,7 +8,7 @@ import requests
 import json
 import time
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import hashlib
@@ -113,6 +113,10 @@ class APISession:
         """获取cookies字典"""
         return {cookie.name: cookie.value for cookie in self.session.cookies}
 
+    def close(self):
+        """关闭HTTP会话，释放连接池中的TCP连接"""
+        self.session.close()
+
 class PureAPILearner:
     """纯API学习器 - 完全脱离浏览器的高性能学习系统"""
 
@@ -486,8 +490,9 @@ class PureAPILearner:
             self.logger.error(f"进度上报异常: {e}")
             return False
 
-    def simulate_course_learning(self, course_info: CourseInfo, speed_multiplier: float = 1.0) -> bool:
-        """模拟课程学习过程"""
+    def simulate_course_learning(self, course_info: CourseInfo, speed_multiplier: float = 1.0,
+                                 progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """模拟课程学习过程，每次上报后以课程总进度百分比调用 progress_callback"""
         try:
             session = LearningSession(
                 course_info=course_info,
@@ -503,6 +508,8 @@ class PureAPILearner:
 
             total_seconds = course_info.duration_minutes * 60
             report_interval = 30  # 每30秒上报一次
+            # 本次会话从课程已有进度开始，回调的进度映射到 [start_progress, 100]，不会倒退
+            start_progress = min(max(course_info.progress, 0.0), 100.0)
 
             for current_position in range(0, total_seconds + 1, report_interval):
                 current_position = min(current_position, total_seconds)
@@ -520,6 +527,8 @@ class PureAPILearner:
 
                 # 上报进度
                 self.report_learning_progress(course_info, current_position)
+                if progress_callback:
+                    progress_callback(start_progress + (100 - start_progress) * completion_rate)
 
                 # 等待（考虑倍速）
                 if current_position < total_seconds:
@@ -537,8 +546,9 @@ class PureAPILearner:
                 self.current_sessions[-1].status = "failed"
             return False
 
-    def learn_course(self, course_info: CourseInfo, speed_multiplier: float = 2.0) -> bool:
-        """学习单门课程的完整流程"""
+    def learn_course(self, course_info: CourseInfo, speed_multiplier: float = 2.0,
+                     progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """学习单门课程的完整流程，progress_callback 在学习过程中接收百分比进度"""
         try:
             # 1. 检查权限
             if not self.check_course_permission(course_info.user_course_id):
@@ -557,7 +567,7 @@ class PureAPILearner:
                 return False
 
             # 4. 模拟学习过程
-            return self.simulate_course_learning(course_info, speed_multiplier)
+            return self.simulate_course_learning(course_info, speed_multiplier, progress_callback)
 
         except Exception as e:
             self.logger.error(f"学习课程失败: {e}")
@@ -605,4 +615,9 @@ class PureAPILearner:
             'failed_sessions': failed_sessions,
             'success_rate': completed_sessions / total_sessions if total_sessions > 0 else 0,
             'user_info': asdict(self.api_session.user_info) if self.api_session.user_info else None
-        }
\ No newline at end of file
+        }
+
+    def close(self):
+        """关闭底层API会话"""
+        self.api_session.close()
+        self.is_logged_in = False
@@ -346,26 +346,12 @@ class SmartLearningScheduler:
 
     def _check_retry_failed_tasks(self):
         """检查并重试失败的任务"""
-        status = self.engine.get_status()
-        current_time = datetime.now()
-
-        with self.engine.task_lock:
-            for task_id, task in self.engine.tasks.items():
-                if (task.status == TaskStatus.FAILED and
-                    task.error_count < self.max_retry_count and
-                    task.end_time and
-                    current_time - task.end_time > timedelta(minutes=self.retry_delay_minutes)):
-
-                    self.logger.info(f"🔄 重试失败任务: {task.course.course_name} (第{task.error_count + 1}次)")
-
-                    # 重置任务状态
-                    task.status = TaskStatus.PENDING
-                    task.start_time = None
-                    task.end_time = None
-                    task.worker_thread_id = None
+        retried_tasks = self.engine.retry_failed_tasks(
+            self.max_retry_count, timedelta(minutes=self.retry_delay_minutes)
+        )
 
-                    # 重新加入队列
-                    self.engine.task_queue.put((task.priority.value, task_id))
+        for task in retried_tasks:
+            self.logger.info(f"🔄 重试失败任务: {task.course.course_name} (第{task.error_count + 1}次)")
 
     def _on_task_completed(self, task):
         """任务完成回调"""